@@ -0,0 +1,253 @@
+"""
+Benchmarks for the engine and the strategies.
+
+Two things are measured:
+
+  * throughput: rounds per second of play_game for every pairing (cycle
+    skipping off, so it's the cost of actually playing the rounds)
+  * latency: median time of one move() and one record_result() call once
+    a player has a history of 10, 1k and 100k rounds
+
+The slope of log(latency) against log(history length) between the two
+longest histories gives a per-call complexity exponent (the shortest one is
+mostly call overhead); a strategy whose move() is O(n^k) costs O(n^(k+1))
+over a match, so anything with k around 1 is quadratic and gets flagged.
+
+Every run also times a fixed pure-Python loop, and comparisons against the
+baseline are scaled by how much faster or slower that loop got, so a busy
+or slower machine doesn't read as a regression.
+
+Usage:
+    python benchmark.py run [Strategy ...]        # measure and print
+    python benchmark.py baseline [Strategy ...]   # measure and save as the baseline
+    python benchmark.py compare [Strategy ...]    # measure and compare against the baseline
+
+`compare` exits with status 1 if anything regressed, so it can gate new
+strategy submissions.
+"""
+import copy
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from seeding import derive_seed
+from strategies.registry import load_strategies
+from tournament import new_match, pairings, play_game
+
+BASELINE_PATH = Path("benchmark_baseline.json")
+RESULTS_PATH = Path("tournament_results") / "benchmark.json"
+
+HISTORY_LENGTHS = (10, 1000, 100000)
+SUPERLINEAR = 0.5      # per-call exponent above which a strategy is flagged
+SLOWDOWN = 1.5         # ratio to the baseline that counts as a regression
+EXPONENT_SLACK = 0.3   # how much a per-call exponent may grow before it counts
+MIN_LATENCY_DELTA = 0.5e-6  # smaller latency changes are timer noise
+
+
+def calibrate(repeats=5):
+    """Seconds for a fixed pure-Python workload, best of `repeats`"""
+    best = math.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        total = 0
+        for i in range(200000):
+            total += i % 7
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def pairing_throughput(S1, S2, rounds=1000, repeats=3, seed=0):
+    """Rounds per second of one pairing, best of `repeats`"""
+    best = math.inf
+    for k in range(repeats):
+        p1, p2 = new_match(S1, S2, derive_seed(seed, S1.__qualname__, S2.__qualname__, k))
+        start = time.perf_counter()
+        play_game(p1, p2, rounds, detect_cycles=False)
+        best = min(best, time.perf_counter() - start)
+    return rounds / best
+
+
+def player_with_history(S, length, seed=0):
+    """
+    A fresh S whose histories and counters hold `length` rounds of random
+    moves. Only record_result is called, so building a long history costs
+    the same for every strategy however slow its move() is.
+    """
+    player = S()
+    player.rng = random.Random(derive_seed(seed, S.__qualname__, "player"))
+    if hasattr(player, "total_rounds"):
+        # keep horizon-aware strategies well away from their endgame
+        player.total_rounds = 2 * length + 1000
+
+    moves = random.Random(derive_seed(seed, S.__qualname__, length))
+    for _ in range(length):
+        player.record_result(moves.choice("CD"), moves.choice("CD"))
+    return player
+
+
+def call_latency(S, length, samples=200, seed=0):
+    """
+    Median seconds per move() and per record_result() at a history of
+    `length` rounds. Every sample times a fresh copy, so the history never
+    grows past `length` while measuring.
+    """
+    player = player_with_history(S, length, seed)
+    opponent_moves = random.Random(derive_seed(seed, S.__qualname__, "opponent"))
+    move_times, record_times = [], []
+    for _ in range(samples):
+        p = copy.deepcopy(player)
+        opponent_move = opponent_moves.choice("CD")
+
+        start = time.perf_counter_ns()
+        my_move = p.move()
+        middle = time.perf_counter_ns()
+        p.record_result(my_move, opponent_move)
+        end = time.perf_counter_ns()
+
+        move_times.append(middle - start)
+        record_times.append(end - middle)
+    return float(np.median(move_times)) * 1e-9, float(np.median(record_times)) * 1e-9
+
+
+def complexity_exponent(lengths, seconds):
+    """
+    Slope of log(seconds) against log(length) over the longest histories:
+    0 for O(1) calls, 1 for O(n)
+    """
+    if len(lengths) > 2:
+        lengths, seconds = lengths[-2:], seconds[-2:]
+    slope, _ = np.polyfit(np.log(lengths), np.log(np.maximum(seconds, 1e-9)), 1)
+    return float(slope)
+
+
+def strategy_latency(S, lengths=HISTORY_LENGTHS, samples=200, seed=0):
+    move, record = {}, {}
+    for n in lengths:
+        move[n], record[n] = call_latency(S, n, samples, seed)
+    return {
+        "move": {str(n): t for n, t in move.items()},
+        "record_result": {str(n): t for n, t in record.items()},
+        "exponent": {
+            "move": complexity_exponent(lengths, [move[n] for n in lengths]),
+            "record_result": complexity_exponent(lengths, [record[n] for n in lengths]),
+        },
+    }
+
+
+def run_benchmarks(strategies=None, rounds=1000, lengths=HISTORY_LENGTHS, samples=200, seed=0):
+    if strategies is None:
+        strategies = load_strategies()
+
+    results = {
+        "version": 1,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "rounds": rounds,
+        "history_lengths": list(lengths),
+        "calibration": calibrate(),
+        "pairings": {},
+        "latency": {},
+    }
+    for S1, S2 in pairings(strategies) + [(S, S) for S in strategies]:
+        results["pairings"][f"{S1.__name__} vs {S2.__name__}"] = pairing_throughput(S1, S2, rounds, seed=seed)
+    for S in strategies:
+        results["latency"][S.__name__] = strategy_latency(S, lengths, samples, seed)
+    return results
+
+
+def superlinear(results):
+    """(strategy, call, exponent) for every call whose cost grows with the history"""
+    flagged = []
+    for name, latency in results["latency"].items():
+        for call, k in latency["exponent"].items():
+            if k > SUPERLINEAR:
+                flagged.append((name, call, k))
+    return flagged
+
+
+def compare(results, baseline):
+    """Human-readable list of regressions against `baseline`"""
+    # > 1 when this machine (or this run) is slower than the baseline's
+    speed = results["calibration"] / baseline["calibration"]
+
+    regressions = []
+    for pair, rps in results["pairings"].items():
+        old = baseline["pairings"].get(pair)
+        if old and old / (rps * speed) > SLOWDOWN:
+            regressions.append(f"{pair}: {rps:,.0f} rounds/s, was {old:,.0f}")
+
+    for name, latency in results["latency"].items():
+        old = baseline["latency"].get(name)
+        if old is None:
+            continue  # new strategy, only the superlinear check applies
+        for call in ("move", "record_result"):
+            for n, t in latency[call].items():
+                if n not in old[call] or t - old[call][n] * speed < MIN_LATENCY_DELTA:
+                    continue
+                if t / (old[call][n] * speed) > SLOWDOWN:
+                    regressions.append(f"{name}.{call} at {n} rounds: {t * 1e6:.2f}us, was {old[call][n] * 1e6:.2f}us")
+            if latency["exponent"][call] > old["exponent"][call] + EXPONENT_SLACK:
+                regressions.append(f"{name}.{call} scaling: n^{latency['exponent'][call]:.2f}, "
+                                   f"was n^{old['exponent'][call]:.2f}")
+
+    for name, call, k in superlinear(results):
+        regressions.append(f"{name}.{call} grows as n^{k:.2f} per call (n^{k + 1:.2f} per match)")
+    return regressions
+
+
+def print_results(results):
+    print(f"throughput ({results['rounds']} rounds per game):")
+    for pair, rps in sorted(results["pairings"].items(), key=lambda x: x[1]):
+        print(f"  {pair:45s} {rps:12,.0f} rounds/s")
+
+    lengths = results["history_lengths"]
+    header = "".join(f"{n:>12,d}" for n in lengths)
+    print(f"\nper-call latency in microseconds, by history length:\n  {'':35s}{header}   exponent")
+    for name, latency in results["latency"].items():
+        for call in ("move", "record_result"):
+            cells = "".join(f"{latency[call][str(n)] * 1e6:12.2f}" for n in lengths)
+            print(f"  {name + '.' + call:35s}{cells}   {latency['exponent'][call]:8.2f}")
+
+
+def save_json(results, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=1)
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "run"
+    if command not in ("run", "baseline", "compare"):
+        raise SystemExit(f"unknown command: {command} (expected run, baseline or compare)")
+
+    names = sys.argv[2:] or None
+    results = run_benchmarks(load_strategies(names=names))
+    print_results(results)
+    save_json(results, RESULTS_PATH)
+
+    if command == "baseline":
+        save_json(results, BASELINE_PATH)
+        print(f"\nsaved baseline to {BASELINE_PATH}")
+    elif command == "compare":
+        if not os.path.exists(BASELINE_PATH):
+            raise SystemExit(f"no baseline at {BASELINE_PATH}; run `python benchmark.py baseline` first")
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f))
+        print()
+        if regressions:
+            print("regressions:")
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print("no regressions")
+    else:
+        for name, call, k in superlinear(results):
+            print(f"warning: {name}.{call} grows as n^{k:.2f} per call")
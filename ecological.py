@@ -0,0 +1,109 @@
+"""
+Ecological (replicator dynamics) tournament.
+
+The round robin is played once to build the matrix of average per-round
+payoffs between every pair of strategies, self-play included. After that,
+each generation is a single matrix-vector product: a strategy's share grows
+in proportion to its average payoff against the current population,
+
+    x' = x * (A @ x) / (x @ A @ x)
+
+so no match is ever re-simulated, however many generations are run.
+"""
+import os
+
+import numpy as np
+
+from strategies.game import DEFAULT_GAME
+from tournament import load_strategies, pairings, play_pairings, results_folder
+
+
+def payoff_matrix(strategies, rounds=200, workers=None, seed=None, game=DEFAULT_GAME):
+    """
+    A[i, j] = average per-round score of strategies[i] playing strategies[j]
+    at `game`.
+    """
+    n = len(strategies)
+    matchups = pairings(strategies) + [(S, S) for S in strategies]
+    scores = play_pairings(matchups, rounds, workers=workers, seed=seed, game=game)
+
+    # pairings() keeps the i < j order, so the indices can be rebuilt the same way
+    index = [(i, j) for i in range(n) for j in range(n) if i < j] + [(i, i) for i in range(n)]
+
+    A = np.zeros((n, n))
+    for (i, j), (score1, score2) in zip(index, scores):
+        if i == j:
+            # both players are the same strategy, so average their two scores
+            A[i, i] = (score1 + score2) / (2 * rounds)
+        else:
+            A[i, j] = score1 / rounds
+            A[j, i] = score2 / rounds
+    return A
+
+
+def replicator_dynamics(A, generations=10000, shares=None, record_every=1, extinction=1e-12):
+    """
+    Evolve population shares under payoff matrix A.
+
+    Shares below `extinction` are set to zero (and renormalised) so that
+    strategies can actually die out. Every `record_every` generations the
+    shares are recorded; the final generation is always recorded.
+
+    Returns:
+        generations_recorded: int array
+        trajectory: array of shape (len(generations_recorded), strategies)
+    """
+    n = A.shape[0]
+    x = np.full(n, 1.0 / n) if shares is None else np.asarray(shares, dtype=float) / np.sum(shares)
+
+    # payoffs only matter relative to each other; shifting them keeps every
+    # fitness positive without changing the dynamics' fixed points
+    A = A - min(0.0, A.min()) + 1e-9
+
+    steps, trajectory = [0], [x.copy()]
+    for g in range(1, generations + 1):
+        fitness = A @ x
+        x = x * fitness / (x @ fitness)
+        if extinction:
+            x[x < extinction] = 0.0
+            x /= x.sum()
+        if g % record_every == 0 or g == generations:
+            steps.append(g)
+            trajectory.append(x.copy())
+
+    return np.array(steps), np.array(trajectory)
+
+
+def survivors(names, shares, threshold=1e-3):
+    """(name, share) for every strategy still above `threshold`, largest first"""
+    alive = [(name, float(share)) for name, share in zip(names, shares) if share > threshold]
+    return sorted(alive, key=lambda x: x[1], reverse=True)
+
+
+def run_ecological(rounds=200, generations=10000, record_every=10, workers=None, seed=None, save=True,
+                   game=DEFAULT_GAME):
+    strategies = load_strategies()
+    names = [s.__name__ for s in strategies]
+    print(f"loaded {len(strategies)} strategies, building the payoff matrix from {rounds}-round games")
+
+    A = payoff_matrix(strategies, rounds=rounds, workers=workers, seed=seed, game=game)
+    steps, trajectory = replicator_dynamics(A, generations=generations, record_every=record_every)
+
+    if save:
+        # a subfolder, so graph_results doesn't take it for a round file
+        folder = results_folder(game) / "ecological"
+        os.makedirs(folder, exist_ok=True)
+        np.savez_compressed(
+            os.path.join(folder, f"ecological_{rounds}rounds.npz"),
+            names=np.array(names), payoffs=A, generations=steps, shares=trajectory,
+        )
+
+    print(f"survivors after {generations} generations:")
+    for name, share in survivors(names, trajectory[-1]):
+        print(f"{name:25s} {share:.4f}")
+
+    return names, A, steps, trajectory
+
+
+if __name__ == "__main__":
+    run_ecological(rounds=200, generations=100000, record_every=100, workers=os.cpu_count(), seed=0)
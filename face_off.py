@@ -1,20 +1,15 @@
 from strategies.tit_for_tat import TitForTat
 from strategies.harrington import HarringtonStrategy
+from strategies.game import DEFAULT_GAME
+from strategies.history import MoveHistory
 
-POINTS = {
-    ('C', 'C'): (3, 3),  # both cooperate
-    ('C', 'D'): (0, 5),  # first cooperate, second betray
-    ('D', 'C'): (5, 0),  # first betray, second cooperate
-    ('D', 'D'): (1, 1)   # both betray 
-}
-
-def play_round(p1, p2):
+def play_round(p1, p2, game=DEFAULT_GAME):
     # each chooses a move based on strategy
     move1 = p1.move()
     move2 = p2.move()
 
     # look up what points each move combination gives
-    point1, point2 = POINTS[(move1, move2)]
+    point1, point2 = game.score(move1, move2)
 
     # let each player update their internal state or belief
     p1.record_result(move1, move2)
@@ -24,22 +19,43 @@ def play_round(p1, p2):
     return move1, move2, point1, point2
 
 
-def play_game(p1, p2, rounds):
+def play_game(p1, p2, rounds, trace=None, game=DEFAULT_GAME):
+    """
+    With `trace` (a file path) every round is streamed to a match_trace file
+    instead of being kept in memory, and both histories come back as None;
+    read them with match_trace.TraceReader.
+    """
+    # each player sees the game from its own side
+    p1.game = game
+    p2.game = game.swapped()
+
+    if trace is not None:
+        from match_trace import TraceWriter
+
+        total1 = total2 = 0
+        with TraceWriter(trace, game=game) as writer:
+            for _ in range(rounds):
+                move1, move2, r1, r2 = play_round(p1, p2, game)
+                total1 += r1
+                total2 += r2
+                writer.write(move1, move2)
+        return total1, total2, None, None
+
     total1 = total2 = 0
-    p1_moves = []
-    p2_moves = []
+    p1_moves = MoveHistory()
+    p2_moves = MoveHistory()
     
     # save moves and scores
     for _ in range(rounds):
-        move1, move2, r1, r2 = play_round(p1, p2)
+        move1, move2, r1, r2 = play_round(p1, p2, game)
         total1 += r1
         total2 += r2
         p1_moves.append(move1)
         p2_moves.append(move2)
 
-    # turn move lists into strings
-    p1_history = ''.join(p1_moves)
-    p2_history = ''.join(p2_moves)
+    # turn move histories into strings
+    p1_history = str(p1_moves)
+    p2_history = str(p2_moves)
 
     return total1, total2, p1_history, p2_history
 
@@ -0,0 +1,235 @@
+"""
+Ashlock-style fingerprints: how a strategy scores against a whole family of
+noisy TitForTat probes.
+
+The probe at (x, y) is TitForTat that cooperates outright with probability
+x, defects outright with probability y, and otherwise copies the strategy's
+last move (the Joss-Ann transform of TitForTat). Where x + y > 1 the dual
+probe (1 - y, 1 - x) is used instead, as in Ashlock's fingerprints;
+TitForTat is its own dual, so this fills the unit square. A strategy's
+fingerprint is its expected average score per round against every probe on
+a resolution x resolution grid.
+
+Against a memoryless-noise probe, a strategy with a `memory_one` vector or
+a `state_table` is a small Markov chain, so its expected score is computed
+exactly, for every grid cell at once, by pushing the state distribution
+forward round by round. Anything else is simulated, `samples` games per
+cell: a job plays a chunk of cells in lockstep, one strategy instance per
+game, while the probes' moves and the payoffs are drawn and looked up for
+the whole chunk at once with NumPy.
+
+Equal fingerprints flag behaviourally equivalent strategies, and the
+distances between them help pick a few representative opponents.
+"""
+import os
+import random
+
+import numpy as np
+
+from seeding import derive_seed
+from strategies.game import DEFAULT_GAME, MOVE_CODES, MOVES
+from tournament import load_strategies, map_jobs, results_folder
+
+# games per cell for simulated fingerprints; the noise in each cell's
+# average score shrinks as 1 / sqrt(samples)
+SIMULATED_SAMPLES = 10
+
+# grid cells per simulation job
+CELLS_PER_JOB = 250
+
+
+def strategy_payoffs(game):
+    # the strategy's payoff for each (its move, probe move), 0 = C, 1 = D
+    return game.payoffs[..., 0].astype(float)
+
+
+def probe_grid(resolution=100):
+    """Cell centres along each axis, so no cell sits on the x + y = 1 diagonal"""
+    return (np.arange(resolution) + 0.5) / resolution
+
+
+def probe_parameters(x, y):
+    """
+    (cooperate, defect) probabilities of the probe at (x, y), with the dual
+    probe used past the diagonal. x and y broadcast.
+    """
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    dual = x + y > 1
+    return np.where(dual, 1 - y, x), np.where(dual, 1 - x, y)
+
+
+def _probe_cooperation(x, y):
+    # chance the probe cooperates, given the strategy's last move was C / D
+    # (the probe opens like TitForTat, i.e. as if the strategy had cooperated)
+    return x + (1 - x - y), x
+
+
+def memory_one_fingerprint(S, x, y, rounds, game=DEFAULT_GAME):
+    """Exact average score per round of memory-one S against the probes at (x, y)"""
+    p = np.asarray(S.memory_one, dtype=float)  # indexed by 2 * my last + their last
+    after_c, after_d = _probe_cooperation(x, y)
+    q = np.stack([after_c, after_c, after_d, after_d], axis=-1)  # probe, by the same index
+
+    # transition between joint states (my move, probe move), batched over cells
+    mine = np.stack([p, 1 - p], axis=-1)       # (4, 2)
+    theirs = np.stack([q, 1 - q], axis=-1)     # (cells, 4, 2)
+    transition = (mine[None, :, :, None] * theirs[:, :, None, :]).reshape(len(x), 4, 4)
+
+    start = np.array([S.memory_one_start, 1 - S.memory_one_start])
+    first = np.stack([1 - y, y], axis=-1)  # probe's opening move
+    dist = (start[None, :, None] * first[:, None, :]).reshape(len(x), 4)
+
+    reward = strategy_payoffs(game).ravel()
+    total = np.zeros(len(x))
+    for _ in range(rounds):
+        total += dist @ reward
+        dist = np.einsum("gk,gkl->gl", dist, transition)
+    return total / rounds
+
+
+def table_fingerprint(S, x, y, rounds, game=DEFAULT_GAME):
+    """Exact average score per round of state-table S against the probes at (x, y)"""
+    moves = np.array([MOVES.index(m) for m, _, _ in S.state_table])
+    next_state = np.array([(c, d) for _, c, d in S.state_table])
+    n = len(moves)
+
+    # chain state: (table state, strategy's last move); the probe reacts to the latter
+    after_c, after_d = _probe_cooperation(x, y)
+    probe_c = np.stack([after_c, after_d], axis=-1)  # (cells, last move)
+
+    # where each (state, probe move) leads, as one-hot matrices (states * 2 -> states * 2)
+    step = np.zeros((2, n * 2, n * 2))
+    for s in range(n):
+        for c in range(2):
+            for last in range(2):
+                step[c, 2 * s + last, 2 * next_state[s, c] + moves[s]] = 1
+
+    # expected payoff from each chain state, given the probe cooperates / defects
+    reward = np.repeat(strategy_payoffs(game)[moves], 2, axis=0)  # (states * 2, probe move)
+    probe_c_by_state = np.tile(probe_c, (1, n))  # (cells, states * 2)
+
+    dist = np.zeros((len(x), n * 2))
+    dist[:, 0] = 1  # state 0, probe opens as if the strategy had cooperated
+    total = np.zeros(len(x))
+    for _ in range(rounds):
+        coop = dist * probe_c_by_state
+        defect = dist - coop
+        total += coop @ reward[:, 0] + defect @ reward[:, 1]
+        dist = coop @ step[0] + defect @ step[1]
+    return total / rounds
+
+
+def _simulate_cells(job):
+    # `samples` games against every probe in a chunk of cells, played in
+    # lockstep; module-level for worker processes
+    S, first, x, y, rounds, samples, seed, game = job
+    games = len(x) * samples
+    x, y = np.repeat(x, samples), np.repeat(y, samples)
+
+    players = []
+    for k in range(games):
+        player = S()
+        player.game = game
+        if hasattr(player, "total_rounds"):
+            player.total_rounds = rounds
+        if seed is not None:
+            player.rng = random.Random(derive_seed(seed, S.__qualname__, first + k // samples, k % samples))
+        players.append(player)
+    rng = np.random.default_rng(None if seed is None else derive_seed(seed, S.__qualname__, "probes", first))
+
+    reward = strategy_payoffs(game)
+    last = np.zeros(games, dtype=np.intp)  # the probe opens as if the strategy had cooperated
+    total = np.zeros(games)
+    for _ in range(rounds):
+        r = rng.random(games)
+        probe = np.where(r < x, 0, np.where(r < x + y, 1, last))
+        try:
+            mine = np.array([MOVE_CODES[p.move()] for p in players], dtype=np.intp)
+        except KeyError as e:
+            raise ValueError(f"Invalid move: {S.__name__} -> {e.args[0]}") from None
+        total += reward[mine, probe]
+        for player, my_move, probe_move in zip(players, mine.tolist(), probe.tolist()):
+            player.record_result(MOVES[my_move], MOVES[probe_move])
+        last = mine
+    return (total / rounds).reshape(-1, samples).mean(axis=1)
+
+
+def fingerprint(S, resolution=100, rounds=200, samples=None, workers=None, seed=None, game=DEFAULT_GAME):
+    """
+    F[i, j] = S's average score per round against the probe at
+    (x = grid[i], y = grid[j]), grid = probe_grid(resolution), playing
+    `game` as player 1. Simulated fingerprints average `samples` games
+    per cell (SIMULATED_SAMPLES by default); exact ones ignore it.
+
+    Returns:
+        F: array of shape (resolution, resolution)
+        method: "memory-one", "state table" or "simulated"
+    """
+    grid = probe_grid(resolution)
+    gx, gy = np.meshgrid(grid, grid, indexing="ij")
+    x, y = probe_parameters(gx.ravel(), gy.ravel())
+
+    if getattr(S, "memory_one", None) is not None:
+        return memory_one_fingerprint(S, x, y, rounds, game).reshape(resolution, resolution), "memory-one"
+    if getattr(S, "state_table", None) is not None:
+        return table_fingerprint(S, x, y, rounds, game).reshape(resolution, resolution), "state table"
+
+    if samples is None:
+        samples = SIMULATED_SAMPLES
+    jobs = [(S, k, x[k:k + CELLS_PER_JOB], y[k:k + CELLS_PER_JOB], rounds, samples, seed, game)
+            for k in range(0, len(x), CELLS_PER_JOB)]
+    F = np.concatenate(map_jobs(_simulate_cells, jobs, workers=workers))
+    return F.reshape(resolution, resolution), "simulated"
+
+
+def distance_matrix(fingerprints):
+    """Mean absolute difference between every two fingerprints, as (names, D)"""
+    names = list(fingerprints)
+    stack = np.stack([fingerprints[name] for name in names]).reshape(len(names), -1)
+    D = np.abs(stack[:, None, :] - stack[None, :, :]).mean(axis=2)
+    return names, D
+
+
+def equivalent_groups(names, D, tolerance=1e-9):
+    """Groups of strategies whose fingerprints are within `tolerance` of each other"""
+    groups, placed = [], set()
+    for i, name in enumerate(names):
+        if name in placed:
+            continue
+        group = [names[j] for j in range(len(names)) if names[j] not in placed and D[i, j] <= tolerance]
+        placed.update(group)
+        groups.append(group)
+    return groups
+
+
+def run_fingerprints(resolution=100, rounds=200, samples=None, workers=None, seed=None, save=True,
+                     game=DEFAULT_GAME):
+    strategies = load_strategies()
+    fingerprints, methods = {}, {}
+    for S in strategies:
+        fingerprints[S.__name__], methods[S.__name__] = fingerprint(
+            S, resolution=resolution, rounds=rounds, samples=samples, workers=workers, seed=seed, game=game)
+        print(f"{S.__name__:25s} {methods[S.__name__]}")
+
+    names, D = distance_matrix(fingerprints)
+    if save:
+        # a subfolder, so graph_results doesn't take these for round files
+        folder = results_folder(game) / "fingerprints"
+        os.makedirs(folder, exist_ok=True)
+        np.savez_compressed(
+            os.path.join(folder, f"fingerprints_{resolution}x{resolution}_{rounds}rounds.npz"),
+            names=np.array(names), grid=probe_grid(resolution),
+            fingerprints=np.stack([fingerprints[name] for name in names]), distances=D,
+        )
+
+    # simulated fingerprints are noisy, so only call exact ties equivalent
+    print("behaviourally equivalent:")
+    for group in equivalent_groups(names, D):
+        if len(group) > 1:
+            print("  " + ", ".join(group))
+
+    return fingerprints, D
+
+
+if __name__ == "__main__":
+    run_fingerprints(resolution=100, rounds=200, workers=os.cpu_count(), seed=0)
@@ -1,13 +1,13 @@
 import os
 import re
 import math
+import json
 from collections import defaultdict, OrderedDict
-import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use("Agg")  
-import matplotlib.pyplot as plt
+from concurrent.futures import ThreadPoolExecutor
 
 DIRECTORY = "tournament_results"   
+STORE_DIRECTORY = os.path.join(DIRECTORY, "store")  # used instead of the CSVs when present
+INDEX_NAME = ".score_index.json"    # parsed scores, kept next to the result files
 TOP_K = None                        
 TITLE = "Tournament Scores by Strategy"
 
@@ -49,35 +49,94 @@ def parse_final_score_line(line: str):
         return None
     return strategy_name, score
 
-def load_scores_by_round(directory: str):
+def parse_score_file(fpath: str):
+    """
+    Read one results file and return {strategy: final score}.
+    """
+    file_scores = {}
+    with open(fpath, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            parsed = parse_final_score_line(line)
+            if parsed is None:
+                continue
+            strategy, score = parsed
+            file_scores[strategy] = score
+    return file_scores
+
+def load_index(index_path: str):
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_index(index_path: str, index: dict):
+    # write then rename so an interrupted run never leaves a broken index
+    tmp = index_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(tmp, index_path)
+
+def load_scores_by_round(directory: str, strategies=None, min_round=None, max_round=None,
+                         workers=8, use_index=True):
     """
     Reads every file in `directory`, collects final scores per round per strategy.
 
+    Parsed scores are kept in an index file in `directory`, keyed by file
+    name with its size and mtime, so only new or changed files get parsed
+    again; those are read on `workers` threads. Files whose round number
+    is outside [min_round, max_round] are never opened, and `strategies`
+    (a collection of names) limits which strategies are returned.
+
     Returns:
         rounds_sorted: list[int]  -> all discovered rounds sorted ascending
         scores: dict[strategy -> dict[round -> score]]
     """
-    scores = defaultdict(dict)  # strategy -> { round -> score }
-    rounds_seen = set()
-
-    for fname in os.listdir(directory):
-        fpath = os.path.join(directory, fname)
-        if not os.path.isfile(fpath):
+    index_path = os.path.join(directory, INDEX_NAME)
+    index = load_index(index_path) if use_index else {}
+    fresh_index = {}
+    to_parse = []  # (fname, fpath, rnd, size, mtime_ns)
+    wanted = []    # (fname, rnd) in directory order
+
+    for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+        if entry.name.startswith(".") or not entry.is_file():
             continue
 
-        rnd = extract_round_number(fname)
+        rnd = extract_round_number(entry.name)
         if rnd < 0:
             # skip files with no round id
             continue
+        if (min_round is not None and rnd < min_round) or (max_round is not None and rnd > max_round):
+            # still remember what we knew about it
+            if entry.name in index:
+                fresh_index[entry.name] = index[entry.name]
+            continue
+
+        stat = entry.stat()
+        known = index.get(entry.name)
+        if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+            fresh_index[entry.name] = known
+        else:
+            to_parse.append((entry.name, entry.path, rnd, stat.st_size, stat.st_mtime_ns))
+        wanted.append((entry.name, rnd))
 
+    if to_parse:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            parsed = pool.map(parse_score_file, [job[1] for job in to_parse])
+            for (fname, _, rnd, size, mtime_ns), file_scores in zip(to_parse, parsed):
+                fresh_index[fname] = {"size": size, "mtime_ns": mtime_ns, "round": rnd, "scores": file_scores}
+
+    if use_index and fresh_index != index:
+        save_index(index_path, fresh_index)
+
+    scores = defaultdict(dict)  # strategy -> { round -> score }
+    rounds_seen = set()
+    for fname, rnd in wanted:
         rounds_seen.add(rnd)
-        with open(fpath, "r", encoding="utf-8", errors="ignore") as f:
-            for line in f:
-                parsed = parse_final_score_line(line)
-                if parsed is None:
-                    continue
-                strategy, score = parsed
-                scores[strategy][rnd] = score
+        for strategy, score in fresh_index[fname]["scores"].items():
+            if strategies is not None and strategy not in strategies:
+                continue
+            scores[strategy][rnd] = score
 
     rounds_sorted = sorted(rounds_seen)
     return rounds_sorted, scores
@@ -107,7 +166,9 @@ def plot_scores(rounds_sorted, scores, title=TITLE):
     """
     import numpy as np
     import itertools
-    import matplotlib.cm as cm
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
 
     plt.figure(figsize=(10, 6))
 
@@ -137,8 +198,24 @@ def plot_scores(rounds_sorted, scores, title=TITLE):
 
 
 
+def load_scores_from_store(directory: str, game=None):
+    """
+    Same as load_scores_by_round, but reads the latest run of every round
+    count from a results_store directory instead of parsing CSV files.
+    Only runs of `game` count (the prisoner's dilemma by default), so runs
+    of other games in the same store don't replace them.
+    """
+    from results_store import ResultsStore
+    from strategies.game import DEFAULT_GAME
+
+    return ResultsStore(directory).scores_by_round(DEFAULT_GAME if game is None else game)
+
+
 if __name__ == "__main__":
-    rounds_sorted, scores = load_scores_by_round(DIRECTORY)
+    if os.path.exists(os.path.join(STORE_DIRECTORY, "manifest.json")):
+        rounds_sorted, scores = load_scores_from_store(STORE_DIRECTORY)
+    else:
+        rounds_sorted, scores = load_scores_by_round(DIRECTORY)
 
     if not rounds_sorted or not scores:
         raise SystemExit("No rounds or scores found. Check DIRECTORY and file contents.")
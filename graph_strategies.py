@@ -1,43 +1,18 @@
-import importlib
-import inspect
-import pkgutil
 from pathlib import Path
 import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
 from typing import List
 
-import matplotlib
-matplotlib.use("Agg") 
-import matplotlib.pyplot as plt
+from strategies.game import DEFAULT_GAME
+from strategies.history import MoveHistory
+from strategies.registry import load_strategies
+
 import numpy as np
 
 fixed = ['C', 'D', 'D', 'D', 'C', 'C', 'C', 'C', 'D', 'C',
          'D', 'D', 'C', 'C', 'C', 'D', 'C', 'C', 'D', 'C']
 
-POINTS = {
-    ('C', 'C'): (3, 3),
-    ('C', 'D'): (0, 5),
-    ('D', 'C'): (5, 0),
-    ('D', 'D'): (1, 1)
-}
-
-def load_strategies(package_name="strategies"):
-    strategies = []
-    package = importlib.import_module(package_name)
-    package_path = Path(package.__file__).parent
-
-    for _, mod_name, _ in pkgutil.iter_modules([str(package_path)]):
-        module = importlib.import_module(f"{package_name}.{mod_name}")
-        for name, obj in inspect.getmembers(module, inspect.isclass):
-            # only include classes defined in that file
-            if obj.__module__ == module.__name__:
-                # skip the abstract base class
-                if name.lower() == "strategy":
-                    continue
-                strategies.append(obj)
-
-    return strategies
-
-
 def safe_move(player):
     """Call player.move() but protect against first-round IndexError bugs."""
     try:
@@ -46,24 +21,25 @@ def safe_move(player):
         return 'C'  # safe default if a strategy incorrectly assumes history exists
 
 
-def play_round_fixed(p1, idx, sequence: List[str]):
+def play_round_fixed(p1, idx, sequence: List[str], game=DEFAULT_GAME):
     """
     Play one round versus a non-adapting fixed-sequence opponent.
 
     p1 : strategy instance
     idx: 0-based round index
     sequence: list of 'C'/'D' chars (fixed opponent script)
+    game: the Game being played, p1 as player 1
     Returns: (r1, r2, move1, move2)
     """
     move1 = safe_move(p1)
     move2 = sequence[idx] if idx < len(sequence) else sequence[-1]
 
-    if move1 not in ("C", "D") or move2 not in ("C", "D"):
+    try:
+        r1, r2 = game.lookup[move1][move2]
+    except (KeyError, TypeError):
         raise ValueError(
             f"Invalid move: {p1.__class__.__name__} -> {move1}, Fixed -> {move2}"
-        )
-
-    r1, r2 = POINTS[(move1, move2)]
+        ) from None
 
     # Update p1's internal state/history
     p1.record_result(move1, move2)
@@ -71,31 +47,58 @@ def play_round_fixed(p1, idx, sequence: List[str]):
     return r1, r2, move1, move2
 
 
-def play_game_vs_fixed(p1, sequence: List[str]):
+def play_game_vs_fixed(p1, sequence: List[str], trace=None, game=DEFAULT_GAME):
     """
     Play p1 against the fixed script for len(sequence) rounds.
 
     Returns:
         total1, total2,
-        moves1 (list[str]), moves2 (list[str]),
-        rows (list[dict])  # round-by-round details
+        moves1 (MoveHistory), moves2 (MoveHistory),
+        rows (iterator of dict)  # round-by-round details, built on demand
+
+    With `trace` (a file path) the moves are streamed to a match_trace file
+    instead of kept in memory: moves1 and moves2 come back as None and the
+    rows are read back from the trace.
     """
     rounds = len(sequence)
 
+    p1.game = game
     if hasattr(p1, "total_rounds"):
         p1.total_rounds = rounds
 
+    if trace is not None:
+        from match_trace import TraceReader, TraceWriter
+
+        total1 = total2 = 0
+        with TraceWriter(trace, game=game) as writer:
+            for i in range(rounds):
+                r1, r2, m1, m2 = play_round_fixed(p1, i, sequence, game)
+                total1 += r1
+                total2 += r2
+                writer.write(m1, m2)
+        return total1, total2, None, None, TraceReader(trace).rows()
+
     total1 = total2 = 0
-    moves1, moves2 = [], []
-    rows = []
+    moves1, moves2 = MoveHistory(), MoveHistory()
 
     for i in range(rounds):
-        r1, r2, m1, m2 = play_round_fixed(p1, i, sequence)
+        r1, r2, m1, m2 = play_round_fixed(p1, i, sequence, game)
         total1 += r1
         total2 += r2
         moves1.append(m1)
         moves2.append(m2)
-        rows.append({
+
+    return total1, total2, moves1, moves2, round_rows(moves1, moves2, game)
+
+
+def round_rows(moves1, moves2, game=DEFAULT_GAME):
+    """Yield the round-by-round details of a finished game, one dict per round."""
+    total1 = total2 = 0
+    for i, (m1, m2) in enumerate(zip(moves1, moves2)):
+        r1, r2 = game.points[(m1, m2)]
+        total1 += r1
+        total2 += r2
+        yield {
             "Round": i + 1,
             "StrategyMove": m1,
             "FixedMove": m2,
@@ -103,35 +106,47 @@ def play_game_vs_fixed(p1, sequence: List[str]):
             "RoundScore_Fixed": r2,
             "Cumulative_Strategy": total1,
             "Cumulative_Fixed": total2,
-        })
+        }
+
+def _pyplot():
+    # matplotlib is only imported once something is actually drawn
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+# above this many rounds the moves are drawn as an image strip instead of dots
+STRIP_ROUNDS = 200
+
+
+def _move_codes(moves):
+    # 0 = C, 1 = D for a MoveHistory, list or string of moves
+    if isinstance(moves, MoveHistory) and moves.depth is None:
+        return moves.to_numpy()
+    return np.fromiter((m == 'D' for m in moves), dtype=np.uint8, count=len(moves))
 
-    return total1, total2, moves1, moves2, rows
 
 def save_round_by_round_plot(strategy_name: str, strat_moves: List[str], fixed_moves: List[str], out_png: Path):
     rounds = len(strat_moves)
+    if rounds > STRIP_ROUNDS:
+        save_move_strip_plot(strategy_name, strat_moves, fixed_moves, out_png)
+        return
 
+    plt = _pyplot()
     fig, ax = plt.subplots(figsize=(max(8, rounds * 0.25), 2.6))
 
-    # y positions for rows (top row = strategy, bottom row = fixed)
-    y_positions = [0, 1]
-
-    # Draw dotted grid (optional)
-    for r in y_positions:
-        for c in range(rounds):
-            ax.plot(c + 0.5, r + 0.5, marker='o',
-                    markersize=18, fillstyle='none',
-                    linestyle=':', color='gray', alpha=0.2)
+    # one cell per round and row (top row = strategy, bottom row = fixed)
+    xs = np.tile(np.arange(rounds) + 0.5, 2)
+    ys = np.repeat([0.5, 1.5], rounds)
+    codes = np.concatenate([_move_codes(strat_moves), _move_codes(fixed_moves)])
 
-    # Place dots
-    for i, m in enumerate(strat_moves):
-        ax.scatter(i + 0.5, 0 + 0.5,
-                   s=200,
-                   c='green' if m == 'C' else 'red')
+    # Draw dotted grid (optional), every cell in one call
+    ax.scatter(xs, ys, s=18 ** 2, facecolors='none', edgecolors='gray',
+               linewidths=1.0, alpha=0.2)
 
-    for i, m in enumerate(fixed_moves):
-        ax.scatter(i + 0.5, 1 + 0.5,
-                   s=200,
-                   c='green' if m == 'C' else 'red')
+    # Place dots, every move in one call
+    ax.scatter(xs, ys, s=200, c=np.where(codes == 0, 'green', 'red'))
 
     # Axis formatting
     ax.set_xlim(0, rounds)
@@ -147,15 +162,49 @@ def save_round_by_round_plot(strategy_name: str, strat_moves: List[str], fixed_m
 
     plt.tight_layout()
     plt.savefig(out_png, dpi=150)
-    plt.close()
+    plt.close(fig)
+
+
+def save_move_strip_plot(strategy_name: str, strat_moves: List[str], fixed_moves: List[str], out_png: Path):
+    """
+    Long games as a two-row image (green = C, red = D), so the figure
+    costs the same to draw however many rounds there are.
+    """
+    from matplotlib.colors import ListedColormap
+    from matplotlib.ticker import MaxNLocator
+    plt = _pyplot()
 
+    rounds = len(strat_moves)
+    strip = np.vstack([_move_codes(strat_moves), _move_codes(fixed_moves)])
 
-def run_fixed(sequence: List[str], save=True, make_plot=True):
+    fig, ax = plt.subplots(figsize=(min(40, max(8, rounds * 0.02)), 2.0))
+    ax.imshow(strip, cmap=ListedColormap(['green', 'red']), vmin=0, vmax=1,
+              aspect='auto', interpolation='nearest', extent=(0, rounds, 2, 0))
+
+    ax.xaxis.set_major_locator(MaxNLocator(nbins=20, integer=True))
+    ax.set_yticks([0.5, 1.5])
+    ax.set_yticklabels([strategy_name, "Fixed"])
+    ax.set_xlabel("Round")
+
+    plt.tight_layout()
+    plt.savefig(out_png, dpi=150)
+    plt.close(fig)
+
+
+def _render_job(job):
+    # module-level so it can be sent to worker processes
+    strategy_name, moves1, moves2, out_png = job
+    save_round_by_round_plot(strategy_name, moves1, moves2, out_png)
+    return out_png
+
+
+def run_fixed(sequence: List[str], save=True, make_plot=True, workers=None, game=DEFAULT_GAME):
     rounds = len(sequence)
 
     strategies = load_strategies()
     results = {}  # name -> score vs fixed
     match_rows = []
+    render_jobs = []
 
     print(f"loaded {len(strategies)} strategies:")
     for s in strategies:
@@ -167,14 +216,22 @@ def run_fixed(sequence: List[str], save=True, make_plot=True):
 
     for S in strategies:
         p1 = S()
-        score1, score2, moves1, moves2, rows = play_game_vs_fixed(p1, sequence)
+        score1, score2, moves1, moves2, rows = play_game_vs_fixed(p1, sequence, game=game)
         results[S.__name__] = score1
         print(f"{S.__name__} vs Fixed: {score1}-{score2}")
 
         # Save per-strategy round-by-round plot
         if make_plot:
             per_strategy_png = outdir / f"fixed_rounds_{rounds}_{S.__name__}.png"
-            save_round_by_round_plot(S.__name__, moves1, moves2, per_strategy_png)
+            render_jobs.append((S.__name__, str(moves1), str(moves2), per_strategy_png))
+
+    # figures are independent, so they can be drawn on several processes
+    if workers and workers > 1 and len(render_jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_render_job, render_jobs))
+    else:
+        for job in render_jobs:
+            _render_job(job)
 
 
     # Print summary
@@ -184,4 +241,4 @@ def run_fixed(sequence: List[str], save=True, make_plot=True):
 
 
 if __name__ == "__main__":
-    run_fixed(fixed, save=True, make_plot=True)
+    run_fixed(fixed, save=True, make_plot=True, workers=os.cpu_count())
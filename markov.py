@@ -0,0 +1,161 @@
+"""
+Exact expected scores for pairings of memory-one strategies.
+
+A strategy that declares `memory_one` (the chance of cooperating after
+each of CC, CD, DC, DD) and `memory_one_start` is fully described by five
+probabilities. Two of them playing each other form a Markov chain on the
+four joint moves (player 1's move, player 2's move), indexed like
+MoveHistory codes, 2 * move1 + move2 with C = 0 and D = 1:
+
+    M[s, t] = P(next joint move t | this round's joint move s)
+
+The expected score over n rounds is start . (I + M + ... + M^(n-1)) . payoff.
+That sum comes out of a single matrix power of the 8x8 block matrix
+[[M, I], [0, I]], so any horizon costs O(log n) 8x8 products. The long-run
+average per round is the stationary distribution's expected payoff.
+
+Pairings where either side isn't memory-one are played out the normal way
+through tournament.play_pairings, so play_pairings here is a drop-in that
+gives exact expectations where it can and seeded samples elsewhere.
+"""
+import os
+
+import numpy as np
+
+from strategies.game import DEFAULT_GAME
+from tournament import load_strategies, pairings, play_pairings as play_object_pairings
+from tournament import print_rankings, record_match, results_folder, save_results
+from seeding import match_seeds
+
+# horizon for the long-run average of chains without a unique stationary
+# distribution; its error is on the order of 1 / LONG_RUN_ROUNDS
+LONG_RUN_ROUNDS = 2 ** 40
+
+
+def is_memory_one(S):
+    return getattr(S, "memory_one", None) is not None and getattr(S, "memory_one_start", None) is not None
+
+
+def transition_matrix(p, q):
+    """
+    The joint chain of memory-one vectors p (player 1) and q (player 2).
+    Player 2's vector is indexed from its own side, so in joint state
+    (a, b) it reads q[2 * b + a].
+    """
+    p = np.asarray(p, dtype=float)
+    q = np.asarray(q, dtype=float)[[0, 2, 1, 3]]  # now indexed by the joint state
+    M = np.empty((4, 4))
+    for s in range(4):
+        move1 = (p[s], 1 - p[s])
+        move2 = (q[s], 1 - q[s])
+        M[s] = [move1[a] * move2[b] for a in (0, 1) for b in (0, 1)]
+    return M
+
+
+def start_distribution(p0, q0):
+    """The distribution of the first round's joint move"""
+    return np.array([p0 * q0, p0 * (1 - q0), (1 - p0) * q0, (1 - p0) * (1 - q0)])
+
+
+def chain(S1, S2):
+    """(start distribution, transition matrix) for S1 vs S2"""
+    return (start_distribution(S1.memory_one_start, S2.memory_one_start),
+            transition_matrix(S1.memory_one, S2.memory_one))
+
+
+def visits(start, M, rounds):
+    """
+    Expected number of rounds spent in each joint state over `rounds`
+    rounds, start . (I + M + ... + M^(rounds - 1)).
+    """
+    block = np.zeros((8, 8))
+    block[:4, :4] = M
+    block[:4, 4:] = np.eye(4)
+    block[4:, 4:] = np.eye(4)
+    return start @ np.linalg.matrix_power(block, rounds)[:4, 4:]
+
+
+def stationary_distribution(M, tol=1e-12):
+    """
+    The distribution pi with pi . M = pi, or None when there isn't a
+    unique one (e.g. TitForTat vs TitForTat, which stays wherever it
+    starts).
+    """
+    # pi spans the null space of (M - I)^T; unique iff that is one-dimensional
+    _, singular, vt = np.linalg.svd((M - np.eye(4)).T)
+    if np.sum(singular < tol) != 1:
+        return None
+    pi = vt[-1]
+    return pi / pi.sum()
+
+
+def expected_scores(S1, S2, rounds, game=DEFAULT_GAME):
+    """Exact expected (score1, score2) of an S1 vs S2 game of `rounds` rounds"""
+    start, M = chain(S1, S2)
+    v = visits(start, M, rounds)
+    return float(v @ game.payoffs[..., 0].ravel()), float(v @ game.payoffs[..., 1].ravel())
+
+
+def long_run_scores(S1, S2, game=DEFAULT_GAME):
+    """
+    Expected (score1, score2) per round in the long run. Uses the
+    stationary distribution when it is unique; otherwise where the chain
+    settles depends on how it starts, so the average is taken from the
+    start over LONG_RUN_ROUNDS rounds.
+    """
+    start, M = chain(S1, S2)
+    pi = stationary_distribution(M)
+    if pi is None:
+        pi = visits(start, M, LONG_RUN_ROUNDS) / LONG_RUN_ROUNDS
+    return float(pi @ game.payoffs[..., 0].ravel()), float(pi @ game.payoffs[..., 1].ravel())
+
+
+def play_pairings(matchups, rounds, workers=None, seed=None, game=DEFAULT_GAME):
+    """
+    Drop-in for tournament.play_pairings: pairings of two memory-one
+    strategies get their exact expected scores (floats), everything else
+    is played out.
+    """
+    seeds = match_seeds(matchups, seed)
+    exact_idx = [k for k, (S1, S2) in enumerate(matchups) if is_memory_one(S1) and is_memory_one(S2)]
+    exact_set = set(exact_idx)
+    object_idx = [k for k in range(len(matchups)) if k not in exact_set]
+
+    scores = [None] * len(matchups)
+    for k in exact_idx:
+        scores[k] = expected_scores(*matchups[k], rounds, game)
+    object_scores = play_object_pairings([matchups[k] for k in object_idx], rounds, workers=workers,
+                                         seeds=[seeds[k] for k in object_idx], game=game)
+    for k, score in zip(object_idx, object_scores):
+        scores[k] = score
+    return scores
+
+
+def run_tournament(rounds=100, save=True, workers=None, seed=None, game=DEFAULT_GAME):
+    """
+    Same as tournament.run_tournament, with memory-one pairings scored by
+    their exact expectation instead of one sample.
+    """
+    strategies = load_strategies()
+    results = {s.__name__: 0 for s in strategies}
+    match_data = []
+
+    print(f"loaded {len(strategies)} strategies:")
+    for s in strategies:
+        print("  -", s.__name__ + (" (memory-one)" if is_memory_one(s) else ""))
+
+    matchups = pairings(strategies)
+    scores = play_pairings(matchups, rounds, workers=workers, seed=seed, game=game)
+
+    for (S1, S2), (score1, score2) in zip(matchups, scores):
+        record_match(results, match_data, S1, S2, score1, score2)
+
+    if save:
+        save_results(rounds, match_data, results, results_folder(game) / "analytic")
+
+    print_rankings(results)
+    return results
+
+
+if __name__ == "__main__":
+    run_tournament(rounds=205, save=True, workers=os.cpu_count(), seed=0)
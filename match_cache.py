@@ -0,0 +1,244 @@
+"""
+On-disk cache of match results, so a tournament only plays pairings that
+are new or whose strategies changed.
+
+Every entry is keyed by a hash of everything the result depends on: the
+source of both strategy classes (their modules, their base classes and the
+strategies-package modules those use), the payoff table, the round count and
+the seed. Editing one strategy file therefore only invalidates the pairings
+that strategy takes part in.
+
+Entries are small JSON files under CACHE_DIR. Once there are more than
+`max_entries`, the least recently used ones are dropped.
+
+Usage:
+    python match_cache.py info     # entry count and size on disk
+    python match_cache.py list     # one line per cached match
+    python match_cache.py clear    # delete every entry
+"""
+import hashlib
+import inspect
+import json
+import os
+import sys
+from pathlib import Path
+
+from seeding import match_seeds
+from strategies.game import DEFAULT_GAME
+from tournament import play_pairings, sweep_pairings
+
+CACHE_DIR = Path(".match_cache")
+CACHE_VERSION = 1  # bump when the engine changes in a way that changes scores
+
+_source_hashes = {}
+
+
+def _module_sources(S):
+    # modules defining S and its base classes, plus same-package modules they use
+    modules = {}
+    for cls in S.__mro__:
+        if cls is object:
+            continue
+        module = inspect.getmodule(cls)
+        if module is not None:
+            modules[module.__name__] = module
+
+    package = S.__module__.split(".")[0]
+    for module in list(modules.values()):
+        for value in vars(module).values():
+            used = inspect.getmodule(value)
+            if used is not None and used.__name__.startswith(package + "."):
+                modules[used.__name__] = used
+
+    return [inspect.getsource(modules[name]) for name in sorted(modules)]
+
+
+def strategy_hash(S):
+    """sha256 of the source a strategy class's behaviour depends on"""
+    if S not in _source_hashes:
+        h = hashlib.sha256()
+        for source in _module_sources(S):
+            h.update(source.encode("utf-8"))
+        _source_hashes[S] = h.hexdigest()
+    return _source_hashes[S]
+
+
+def is_deterministic(S):
+    return getattr(S, "deterministic", False)
+
+
+class MatchCache:
+    def __init__(self, directory=CACHE_DIR, max_entries=200000):
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._count = None  # entries on disk, counted lazily
+
+    def key(self, S1, S2, rounds, seed=None, game=DEFAULT_GAME):
+        blob = json.dumps({
+            "version": CACHE_VERSION,
+            "players": [
+                [S1.__module__, S1.__qualname__, strategy_hash(S1)],
+                [S2.__module__, S2.__qualname__, strategy_hash(S2)],
+            ],
+            "points": game.payoff_table(),
+            "rounds": rounds,
+            "seed": seed,
+        }, sort_keys=True)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def cacheable(self, S1, S2, seed=None):
+        # random pairings only give repeatable results when they are seeded
+        return seed is not None or (is_deterministic(S1) and is_deterministic(S2))
+
+    def pairing_key(self, S1, S2, rounds, seed=None, game=DEFAULT_GAME):
+        # the seed makes no difference when neither side uses randomness
+        if is_deterministic(S1) and is_deterministic(S2):
+            seed = None
+        return self.key(S1, S2, rounds, seed, game)
+
+    def _path(self, key):
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        os.utime(path)  # mark as recently used
+        self.hits += 1
+        return tuple(entry["scores"])
+
+    def put(self, key, scores, **info):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        existed = path.exists()
+
+        # write then rename so a crash never leaves half an entry behind
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"scores": list(scores), **info}, f)
+        os.replace(tmp, path)
+
+        if not existed:
+            if self._count is None:
+                self._count = sum(1 for _ in self._files())
+            else:
+                self._count += 1
+            if self._count > self.max_entries:
+                self.evict()
+
+    def _files(self):
+        if not self.directory.exists():
+            return iter(())
+        return self.directory.glob("*/*.json")
+
+    def evict(self, keep=None):
+        """Drop least recently used entries until at most `keep` are left (90% of max_entries by default)"""
+        if keep is None:
+            keep = int(self.max_entries * 0.9)
+        files = sorted(self._files(), key=lambda p: p.stat().st_mtime)
+        for path in files[:max(0, len(files) - keep)]:
+            path.unlink(missing_ok=True)
+        self._count = min(len(files), keep)
+
+    def clear(self):
+        for path in self._files():
+            path.unlink(missing_ok=True)
+        self._count = 0
+
+    def info(self):
+        files = list(self._files())
+        return {
+            "directory": str(self.directory),
+            "entries": len(files),
+            "bytes": sum(p.stat().st_size for p in files),
+            "max_entries": self.max_entries,
+        }
+
+    def entries(self):
+        """Yield (key, entry dict) for everything in the cache"""
+        for path in self._files():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    yield path.stem, json.load(f)
+            except (OSError, ValueError):
+                continue
+
+    def play_pairings(self, matchups, rounds, workers=None, seed=None, timings=None, game=DEFAULT_GAME):
+        """
+        Same as tournament.play_pairings, but only plays the pairings that
+        aren't cached yet (or can't be cached) and stores the new results.
+        `timings` only sees the pairings actually played.
+        """
+        # entries are keyed on each match's own seed, so they stay valid
+        # whichever other pairings are in the tournament
+        seeds = match_seeds(matchups, seed)
+        scores = [None] * len(matchups)
+        keys = {}
+        missing = []
+        for k, ((S1, S2), s) in enumerate(zip(matchups, seeds)):
+            if self.cacheable(S1, S2, s):
+                keys[k] = self.pairing_key(S1, S2, rounds, s, game)
+                scores[k] = self.get(keys[k])
+            if scores[k] is None:
+                missing.append(k)
+
+        played = play_pairings([matchups[k] for k in missing], rounds, workers=workers,
+                               seeds=[seeds[k] for k in missing], timings=timings, game=game)
+        for k, score in zip(missing, played):
+            scores[k] = score
+            if k in keys:
+                S1, S2 = matchups[k]
+                self.put(keys[k], score, p1=S1.__name__, p2=S2.__name__, rounds=rounds, seed=seeds[k])
+        return scores
+
+    def sweep_pairings(self, matchups, horizons, workers=None, seed=None, timings=None, game=DEFAULT_GAME):
+        """
+        Same as tournament.sweep_pairings; a pairing is only re-played when
+        one of its round counts is missing from the cache.
+        """
+        horizons = sorted(set(horizons))
+        seeds = match_seeds(matchups, seed)
+        scores = [None] * len(matchups)
+        missing = []
+        for k, ((S1, S2), s) in enumerate(zip(matchups, seeds)):
+            if self.cacheable(S1, S2, s):
+                cached = [self.get(self.pairing_key(S1, S2, n, s, game)) for n in horizons]
+                if None not in cached:
+                    scores[k] = cached
+                    continue
+            missing.append(k)
+
+        played = sweep_pairings([matchups[k] for k in missing], horizons, workers=workers,
+                                seeds=[seeds[k] for k in missing], timings=timings, game=game)
+        for k, sweep in zip(missing, played):
+            scores[k] = sweep
+            S1, S2 = matchups[k]
+            if self.cacheable(S1, S2, seeds[k]):
+                for n, score in zip(horizons, sweep):
+                    self.put(self.pairing_key(S1, S2, n, seeds[k], game), score,
+                             p1=S1.__name__, p2=S2.__name__, rounds=n, seed=seeds[k])
+        return scores
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "info"
+    cache = MatchCache()
+
+    if command == "info":
+        for name, value in cache.info().items():
+            print(f"{name:12s} {value}")
+    elif command == "list":
+        for key, entry in cache.entries():
+            print(f"{key[:12]}  {entry.get('p1')} vs {entry.get('p2')}  "
+                  f"rounds={entry.get('rounds')} seed={entry.get('seed')}  {entry['scores']}")
+    elif command == "clear":
+        cache.clear()
+        print(f"cleared {cache.directory}")
+    else:
+        raise SystemExit(f"unknown command: {command} (expected info, list or clear)")
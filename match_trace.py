@@ -0,0 +1,182 @@
+"""
+Compact on-disk traces of every round of a game.
+
+A trace file is a fixed 64-byte header followed by fixed-size chunks. Each
+chunk starts with both players' cumulative scores before the chunk (two
+int64s) and then holds `chunk_rounds` rounds at 2 bits per joint move
+(first player's move in the high bit, 0 = C, 1 = D). Because every chunk has
+the same size, round i lives at a known offset, so the reader can memory-map
+the file and answer questions about any round or slice while only decoding
+at most one chunk's worth of moves.
+
+    with TraceWriter("game.trace") as trace:
+        for ...:
+            trace.write(move1, move2)
+
+    reader = TraceReader("game.trace")
+    reader.round(41)       # (move1, move2, score1, score2, total1, total2)
+    reader.moves(100, 200) # ('CCD...', 'DCC...')
+"""
+import mmap
+import struct
+
+import numpy as np
+
+from strategies.game import DEFAULT_GAME
+
+MAGIC = b"PDTRACE1"
+HEADER = struct.Struct("<8sIIQ8i")  # magic, version, chunk_rounds, rounds, payoffs
+HEADER_SIZE = 64
+CHECKPOINT = struct.Struct("<qq")
+JOINT = [("C", "C"), ("C", "D"), ("D", "C"), ("D", "D")]
+CODES = {pair: code for code, pair in enumerate(JOINT)}
+
+
+class TraceWriter:
+    def __init__(self, path, chunk_rounds=4096, game=DEFAULT_GAME):
+        if chunk_rounds <= 0 or chunk_rounds % 4:
+            raise ValueError("chunk_rounds must be a positive multiple of 4")
+        if game.payoffs.dtype.kind != "i":
+            raise ValueError("traces only store integer payoffs")
+        self.path = path
+        self.chunk_rounds = chunk_rounds
+        self.payoffs = [p for pair in JOINT for p in game.points[pair]]
+        self.rounds = 0
+        self.total1 = self.total2 = 0
+
+        self._file = open(path, "wb")
+        self._write_header()
+        self._file.seek(HEADER_SIZE)
+        self._start_chunk()
+
+    def _write_header(self):
+        header = HEADER.pack(MAGIC, 1, self.chunk_rounds, self.rounds, *self.payoffs)
+        self._file.seek(0)
+        self._file.write(header.ljust(HEADER_SIZE, b"\0"))
+
+    def _start_chunk(self):
+        self._checkpoint = (self.total1, self.total2)
+        self._packed = bytearray(self.chunk_rounds // 4)
+        self._in_chunk = 0
+
+    def _flush_chunk(self):
+        self._file.write(CHECKPOINT.pack(*self._checkpoint))
+        self._file.write(self._packed)
+
+    def write(self, move1, move2):
+        code = CODES[(move1, move2)]
+        j = self._in_chunk
+        self._packed[j >> 2] |= code << (2 * (j & 3))
+        self.total1 += self.payoffs[2 * code]
+        self.total2 += self.payoffs[2 * code + 1]
+        self.rounds += 1
+        self._in_chunk += 1
+        if self._in_chunk == self.chunk_rounds:
+            self._flush_chunk()
+            self._start_chunk()
+
+    def close(self):
+        if self._file.closed:
+            return
+        if self._in_chunk:
+            self._flush_chunk()  # padded with zeros, the header says where it ends
+        self._write_header()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TraceReader:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.chunk_rounds, self.rounds, *payoffs = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a trace file")
+        self.payoffs = np.array(payoffs, dtype=np.int64).reshape(4, 2)  # joint code -> (score1, score2)
+        self._chunk_bytes = CHECKPOINT.size + self.chunk_rounds // 4
+
+    def __len__(self):
+        return self.rounds
+
+    def close(self):
+        self._mm.close()
+
+    def _check(self, i):
+        if not 0 <= i < self.rounds:
+            raise IndexError("round out of range")
+
+    def _checkpoint(self, chunk):
+        return CHECKPOINT.unpack_from(self._mm, HEADER_SIZE + chunk * self._chunk_bytes)
+
+    def codes(self, start=0, stop=None):
+        """Joint move codes (0-3) for rounds start..stop-1, as a uint8 array"""
+        stop = self.rounds if stop is None else min(stop, self.rounds)
+        if start >= stop:
+            return np.zeros(0, dtype=np.uint8)
+
+        parts = []
+        chunk = start // self.chunk_rounds
+        while chunk * self.chunk_rounds < stop:
+            first = chunk * self.chunk_rounds
+            offset = HEADER_SIZE + chunk * self._chunk_bytes + CHECKPOINT.size
+            packed = np.frombuffer(self._mm, dtype=np.uint8, count=self.chunk_rounds // 4, offset=offset)
+            unpacked = (packed[:, None] >> np.array([0, 2, 4, 6], dtype=np.uint8)) & 3
+            lo, hi = max(start, first) - first, min(stop, first + self.chunk_rounds) - first
+            parts.append(unpacked.ravel()[lo:hi])
+            chunk += 1
+        return np.concatenate(parts)
+
+    def moves(self, start=0, stop=None):
+        """Both players' moves for rounds start..stop-1, as two 'CD...' strings"""
+        codes = self.codes(start, stop)
+        letters = np.array([ord("C"), ord("D")], dtype=np.uint8)
+        return letters[codes >> 1].tobytes().decode(), letters[codes & 1].tobytes().decode()
+
+    def totals(self, i):
+        """Cumulative (score1, score2) after round i (0-based)"""
+        self._check(i)
+        chunk = i // self.chunk_rounds
+        total1, total2 = self._checkpoint(chunk)
+        scores = self.payoffs[self.codes(chunk * self.chunk_rounds, i + 1)].sum(axis=0)
+        return total1 + int(scores[0]), total2 + int(scores[1])
+
+    def round(self, i):
+        """(move1, move2, score1, score2, total1, total2) for round i (0-based)"""
+        self._check(i)
+        code = int(self.codes(i, i + 1)[0])
+        move1, move2 = JOINT[code]
+        score1, score2 = (int(s) for s in self.payoffs[code])
+        return (move1, move2, score1, score2) + self.totals(i)
+
+    def rows(self, start=0, stop=None, chunk_rounds=4096):
+        """
+        Yield round-by-round dicts like graph_strategies.round_rows, decoding
+        one chunk at a time.
+        """
+        stop = self.rounds if stop is None else min(stop, self.rounds)
+        if start >= stop:
+            return
+        total1, total2 = self.totals(start - 1) if start else (0, 0)
+        for first in range(start, stop, chunk_rounds):
+            codes = self.codes(first, min(stop, first + chunk_rounds))
+            for k, code in enumerate(codes.tolist()):
+                move1, move2 = JOINT[code]
+                score1, score2 = (int(s) for s in self.payoffs[code])
+                total1 += score1
+                total2 += score2
+                yield {
+                    "Round": first + k + 1,
+                    "StrategyMove": move1,
+                    "FixedMove": move2,
+                    "RoundScore_Strategy": score1,
+                    "RoundScore_Fixed": score2,
+                    "Cumulative_Strategy": total1,
+                    "Cumulative_Fixed": total2,
+                }
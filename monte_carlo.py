@@ -0,0 +1,136 @@
+"""
+Monte Carlo repetition mode for tournaments with random strategies.
+
+A single run_tournament gives one noisy sample for every pairing involving a
+random strategy. Here each such pairing is replayed, every repetition with
+its own seed, until the confidence interval of both players' mean score is
+narrower than `tolerance` points or `max_reps` is reached. Pairings between
+two deterministic strategies are played exactly once, and pairings between
+two memory-one strategies aren't played at all: markov.py gives their exact
+expected scores (reported as 0 repetitions).
+"""
+import csv
+import math
+import os
+import random
+from statistics import NormalDist
+
+from markov import expected_scores, is_memory_one
+from seeding import derive_seed, match_seeds
+from strategies.game import DEFAULT_GAME
+from tournament import load_strategies, map_jobs, new_match, pairings, play_game, results_folder
+
+
+def half_width(values, z):
+    # half the width of the normal-approximation confidence interval of the mean
+    n = len(values)
+    if n < 2:
+        return math.inf
+    mean = sum(values) / n
+    variance = sum((v - mean) ** 2 for v in values) / (n - 1)
+    return z * math.sqrt(variance / n)
+
+
+def replay_pairing(S1, S2, rounds, match_seed, tolerance, max_reps=1000, min_reps=5, confidence=0.95,
+                   game=DEFAULT_GAME):
+    """
+    Replay one pairing until both means are known to within +/- tolerance.
+
+    Returns (mean1, mean2, half_width1, half_width2, repetitions);
+    0 repetitions means the means are exact (markov.py).
+    """
+    if getattr(S1, "deterministic", False) and getattr(S2, "deterministic", False):
+        score1, score2 = play_game(*new_match(S1, S2), rounds, game=game)
+        return score1, score2, 0.0, 0.0, 1
+    if is_memory_one(S1) and is_memory_one(S2):
+        score1, score2 = expected_scores(S1, S2, rounds, game)
+        return score1, score2, 0.0, 0.0, 0
+
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    scores1, scores2 = [], []
+    while len(scores1) < max_reps:
+        rep_seed = derive_seed(match_seed, "repetition", len(scores1))
+        score1, score2 = play_game(*new_match(S1, S2, rep_seed), rounds, game=game)
+        scores1.append(score1)
+        scores2.append(score2)
+
+        if len(scores1) >= min_reps:
+            if half_width(scores1, z) <= tolerance and half_width(scores2, z) <= tolerance:
+                break
+
+    n = len(scores1)
+    return sum(scores1) / n, sum(scores2) / n, half_width(scores1, z), half_width(scores2, z), n
+
+
+def _replay_job(job):
+    S1, S2, rounds, match_seed, options = job
+    return replay_pairing(S1, S2, rounds, match_seed, **options)
+
+
+def run_monte_carlo(rounds=100, tolerance=1.0, max_reps=1000, min_reps=5, confidence=0.95,
+                    seed=None, save=True, workers=None, game=DEFAULT_GAME):
+    """
+    Tournament where every random pairing is repeated until its mean score
+    is known to within +/- `tolerance` points (at the given confidence).
+
+    Returns (match_rows, totals) where totals maps strategy name to
+    (sum of mean scores, half-width of its confidence interval).
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 63)
+
+    strategies = load_strategies()
+    print(f"loaded {len(strategies)} strategies, seed {seed}")
+
+    matchups = pairings(strategies)
+    options = dict(tolerance=tolerance, max_reps=max_reps, min_reps=min_reps, confidence=confidence, game=game)
+    jobs = [(S1, S2, rounds, s, options) for (S1, S2), s in zip(matchups, match_seeds(matchups, seed))]
+    replays = map_jobs(_replay_job, jobs, workers)
+
+    # a strategy's total is a sum of independent match means, so variances add up
+    means = {s.__name__: 0.0 for s in strategies}
+    variances = {s.__name__: 0.0 for s in strategies}
+    match_rows = []
+    for (S1, S2), (mean1, mean2, hw1, hw2, reps) in zip(matchups, replays):
+        means[S1.__name__] += mean1
+        means[S2.__name__] += mean2
+        variances[S1.__name__] += hw1 ** 2
+        variances[S2.__name__] += hw2 ** 2
+
+        print(f"{S1.__name__} vs {S2.__name__}: {mean1:.2f}±{hw1:.2f} - {mean2:.2f}±{hw2:.2f} ({reps} reps)")
+        match_rows.append({
+            "Player 1": S1.__name__,
+            "Player 2": S2.__name__,
+            "Score 1": round(mean1, 3),
+            "Score 2": round(mean2, 3),
+            "Score 1 CI": round(hw1, 3),
+            "Score 2 CI": round(hw2, 3),
+            "Repetitions": reps,
+        })
+
+    totals = {name: (means[name], math.sqrt(variances[name])) for name in means}
+
+    if save:
+        # kept in a subfolder so graph_results doesn't mix these up with single runs
+        folder = results_folder(game) / "monte_carlo"
+        folder.mkdir(parents=True, exist_ok=True)
+        filename = folder / f"monte_carlo_results_{rounds}rounds.csv"
+
+        with open(filename, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(match_rows[0]) if match_rows else ["Player 1"])
+            writer.writeheader()
+            writer.writerows(match_rows)
+
+            writer.writerow({})  # blank line before final scores
+            for name, (total, hw) in sorted(totals.items(), key=lambda x: x[1][0], reverse=True):
+                f.write(f"final score,{name},{total:.3f},{hw:.3f}\n")
+
+    print(f"final rankings ({confidence:.0%} intervals):")
+    for name, (total, hw) in sorted(totals.items(), key=lambda x: x[1][0], reverse=True):
+        print(f"{name:25s} {total:10.2f} ± {hw:.2f}")
+
+    return match_rows, totals
+
+
+if __name__ == "__main__":
+    run_monte_carlo(rounds=205, tolerance=1.0, max_reps=2000, seed=0, workers=os.cpu_count())
@@ -0,0 +1,356 @@
+"""
+Strategies running as external processes, playing alongside the classes in
+strategies/.
+
+A remote strategy is any program that speaks this line-delimited JSON
+protocol on stdin / stdout (one object per line):
+
+    -> {"type": "start", "match": id, "rounds": N, "opponent": name, "seed": int or null, "payoffs": P}
+    -> {"type": "move", "match": id, "round": k, "last": [my move, their move] or null}
+    <- {"match": id, "round": k, "move": "C" or "D"}
+    -> {"type": "end", "match": id, "score": [mine, theirs]}
+    -> {"type": "quit"}
+
+P[my move][their move] is [my payoff, their payoff], with C = 0 and D = 1
+(the game being played, see strategies/game.py).
+
+Only "move" gets an answer. The previous round's result rides along with
+each move request, and every message names its match, so one process
+plays any number of matches at once: an asyncio scheduler keeps up to
+`max_in_flight` matches going and writes their move requests down the
+same pipe without waiting for each other, so a slow bot only holds up its
+own matches. Answers are matched back to requests by (match, round).
+
+Every answer has `move_timeout` seconds to arrive; a bot that takes longer
+gets `default_move` played for it that round (and its late answer is
+dropped), so a hung bot can't stall the tournament. An answer that isn't
+'C' / 'D' is replaced the same way, and a bot that exits plays
+`default_move` for the rest of its matches: a broken bot only costs its own
+pairings. Results are saved under tournament_results/remote/.
+
+stub_bot.py is a TitForTat that speaks the protocol, for testing:
+
+    python remote.py "TitForTatBot=python stub_bot.py"
+"""
+import asyncio
+import itertools
+import json
+import random
+import shlex
+import sys
+
+from seeding import derive_seed, match_seeds
+from strategies.game import DEFAULT_GAME
+from tournament import load_strategies, pairings, play_pairings, print_rankings, record_match, results_folder
+from tournament import save_results
+
+# seconds a bot gets to exit after "quit" before it is killed
+QUIT_TIMEOUT = 5.0
+
+
+class BotExited(RuntimeError):
+    pass
+
+
+class RemoteStrategy:
+    """
+    An external program playing as `name`. It stands in for a strategy
+    class in pairings(), match_seeds() and record_match(), which only look
+    at __name__ / __qualname__.
+    """
+
+    def __init__(self, name, command):
+        self.__name__ = self.__qualname__ = name
+        self.command = list(command)
+
+    def __repr__(self):
+        return f"RemoteStrategy({self.__name__!r}, {self.command!r})"
+
+
+class RemoteBot:
+    """One running external process, shared by every match it plays"""
+
+    def __init__(self, strategy):
+        self.strategy = strategy
+        self.process = None
+        self.pending = {}  # (match, round) -> future move
+        self._outgoing = []  # lines waiting for the next write
+        self._writer = None  # the task writing them out, while there are any
+        self._reader = None
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            *self.strategy.command, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+            limit=1 << 20,
+        )
+        self._reader = asyncio.ensure_future(self._read())
+
+    async def _read(self):
+        try:
+            while True:
+                line = await self.process.stdout.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    key, move = (message["match"], message["round"]), message["move"]
+                except (ValueError, KeyError, TypeError):
+                    # whatever it was answering times out
+                    print(f"{self.strategy.__name__} sent a malformed line: {line[:80]!r}")
+                    continue
+                future = self.pending.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_result(move)
+        finally:
+            # the bot went away: nobody waiting on it should hang
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(BotExited(f"{self.strategy.__name__} exited"))
+            self.pending.clear()
+
+    def send(self, message):
+        # everything sent while the last write drains goes out in the next one
+        self._outgoing.append(json.dumps(message))
+        if self._writer is None:
+            self._writer = asyncio.ensure_future(self._flush())
+
+    async def _flush(self):
+        stdin = self.process.stdin
+        try:
+            while self._outgoing and not stdin.is_closing():
+                lines, self._outgoing = self._outgoing, []
+                stdin.write(("\n".join(lines) + "\n").encode("utf-8"))
+                # wait for the pipe to take it, rather than piling up in memory
+                # behind a bot that has stopped reading
+                await stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the bot went away; _read fails whoever is waiting on it
+        finally:
+            self._outgoing.clear()
+            self._writer = None
+
+    def request(self, match, round_num, last):
+        """Send a move request; returns the future the answer will land in"""
+        if self._reader.done():
+            raise BotExited(f"{self.strategy.__name__} exited")
+        future = asyncio.get_running_loop().create_future()
+        self.pending[(match, round_num)] = future
+        self.send({"type": "move", "match": match, "round": round_num, "last": last})
+        return future
+
+    async def close(self):
+        if self.process is None:
+            return
+        self.send({"type": "quit"})
+        try:
+            await asyncio.wait_for(self._writer, QUIT_TIMEOUT)
+            self.process.stdin.close()
+            await asyncio.wait_for(self.process.wait(), QUIT_TIMEOUT)
+        except (BrokenPipeError, ConnectionResetError):
+            await self.process.wait()
+        except asyncio.TimeoutError:
+            # hung, or not reading its input any more
+            self.process.kill()
+            await self.process.wait()
+        await self._reader
+
+
+class LocalSide:
+    """An in-process strategy, driven like a remote one"""
+
+    def __init__(self, S, side, rounds, match_seed, game=DEFAULT_GAME):
+        self.player = S()
+        self.player.game = game
+        if match_seed is not None:
+            # the same stream tournament.seed_players would give this side
+            self.player.rng = random.Random(derive_seed(match_seed, side))
+        if hasattr(self.player, "total_rounds"):
+            self.player.total_rounds = rounds
+
+    def request(self, round_num):
+        return self.player.move()
+
+    def result(self, my_move, opponent_move):
+        self.player.record_result(my_move, opponent_move)
+
+    def end(self, score):
+        pass
+
+
+class RemoteSide:
+    """One side of one match, played by a RemoteBot"""
+
+    def __init__(self, bot, match, side, rounds, match_seed, opponent, game=DEFAULT_GAME,
+                 move_timeout=None, default_move="D"):
+        self.bot, self.match = bot, match
+        self.move_timeout = move_timeout
+        self.default_move = default_move
+        self.last = None
+        self.exited = False
+        bot.send({
+            "type": "start", "match": match, "rounds": rounds, "opponent": opponent.__name__,
+            "seed": None if match_seed is None else derive_seed(match_seed, side),
+            "payoffs": game.values,
+        })
+
+    def request(self, round_num):
+        if self.exited:
+            return self.default_move
+        try:
+            future = self.bot.request(self.match, round_num, self.last)
+        except BotExited:
+            return self._exit(round_num)
+        # a task, so the clock starts now rather than when play_match gets to it
+        return asyncio.ensure_future(self._answer(future, round_num))
+
+    async def _answer(self, future, round_num):
+        try:
+            move = await asyncio.wait_for(future, self.move_timeout)
+        except asyncio.TimeoutError:
+            self.bot.pending.pop((self.match, round_num), None)
+            return self._replace(round_num, f"gave no move within {self.move_timeout}s")
+        except BotExited:
+            return self._exit(round_num)
+        if move not in ("C", "D"):
+            return self._replace(round_num, f"sent an invalid move {move!r}")
+        return move
+
+    def _replace(self, round_num, problem):
+        print(f"{self.bot.strategy.__name__} {problem} (match {self.match}, round {round_num + 1}), "
+              f"playing {self.default_move}")
+        return self.default_move
+
+    def _exit(self, round_num):
+        # nothing left to ask: the rest of the match is default moves
+        self.exited = True
+        print(f"{self.bot.strategy.__name__} exited (match {self.match}, round {round_num + 1}), "
+              f"playing {self.default_move} for the rest of the match")
+        return self.default_move
+
+    def result(self, my_move, opponent_move):
+        self.last = [my_move, opponent_move]
+
+    def end(self, score):
+        if not self.exited:
+            self.bot.send({"type": "end", "match": self.match, "score": list(score)})
+
+
+async def play_match(side1, side2, rounds, names, game=DEFAULT_GAME):
+    lookup = game.lookup
+    total1 = total2 = 0
+    for round_num in range(rounds):
+        # ask both sides before waiting on either; local sides answer at once,
+        # remote ones with a future
+        move1 = side1.request(round_num)
+        move2 = side2.request(round_num)
+        if isinstance(move1, asyncio.Future):
+            move1 = await move1
+        if isinstance(move2, asyncio.Future):
+            move2 = await move2
+        try:
+            r1, r2 = lookup[move1][move2]
+        except (KeyError, TypeError):
+            raise ValueError(f"Invalid move: {names[0]} -> {move1}, {names[1]} -> {move2}") from None
+        total1 += r1
+        total2 += r2
+        side1.result(move1, move2)
+        side2.result(move2, move1)
+    side1.end((total1, total2))
+    side2.end((total2, total1))
+    return total1, total2
+
+
+async def play_remote_pairings(matchups, rounds, seeds, max_in_flight=256, game=DEFAULT_GAME,
+                               move_timeout=5.0, default_move="D"):
+    """Play pairings where at least one side is a RemoteStrategy, many at a time"""
+    bots = {}
+    for S in {S for pair in matchups for S in pair if isinstance(S, RemoteStrategy)}:
+        bots[S] = RemoteBot(S)
+        await bots[S].start()
+
+    match_ids = itertools.count()
+    limit = asyncio.Semaphore(max_in_flight)
+
+    def side(S, number, opponent, match_seed):
+        seen_as = game if number == 1 else game.swapped()
+        if isinstance(S, RemoteStrategy):
+            return RemoteSide(bots[S], next(match_ids), number, rounds, match_seed, opponent, seen_as,
+                              move_timeout, default_move)
+        return LocalSide(S, number, rounds, match_seed, seen_as)
+
+    async def one(S1, S2, match_seed):
+        async with limit:
+            return await play_match(side(S1, 1, S2, match_seed), side(S2, 2, S1, match_seed),
+                                    rounds, (S1.__name__, S2.__name__), game)
+
+    try:
+        return await asyncio.gather(*(one(S1, S2, s) for (S1, S2), s in zip(matchups, seeds)))
+    finally:
+        for bot in bots.values():
+            await bot.close()
+
+
+async def play_mixed_pairings(matchups, rounds, workers=None, seed=None, max_in_flight=256,
+                              game=DEFAULT_GAME, move_timeout=5.0, default_move="D"):
+    """
+    Scores for every pairing, in `matchups` order: pairings of two local
+    classes go through tournament.play_pairings (in a thread, so they
+    overlap with the remote matches), the rest through the async scheduler.
+    """
+    seeds = match_seeds(matchups, seed)
+    remote_idx = [k for k, (S1, S2) in enumerate(matchups)
+                  if isinstance(S1, RemoteStrategy) or isinstance(S2, RemoteStrategy)]
+    remote_set = set(remote_idx)
+    local_idx = [k for k in range(len(matchups)) if k not in remote_set]
+
+    local = asyncio.get_running_loop().run_in_executor(
+        None, lambda: play_pairings([matchups[k] for k in local_idx], rounds, workers=workers,
+                                    seeds=[seeds[k] for k in local_idx], game=game))
+    remote = play_remote_pairings([matchups[k] for k in remote_idx], rounds,
+                                  [seeds[k] for k in remote_idx], max_in_flight, game, move_timeout, default_move)
+    local_scores, remote_scores = await asyncio.gather(local, remote)
+
+    scores = [None] * len(matchups)
+    for k, score in zip(local_idx, local_scores):
+        scores[k] = score
+    for k, score in zip(remote_idx, remote_scores):
+        scores[k] = score
+    return scores
+
+
+def run_tournament(rounds=100, remotes=(), save=True, workers=None, seed=None, max_in_flight=256,
+                   game=DEFAULT_GAME, move_timeout=5.0, default_move="D"):
+    """Same as tournament.run_tournament, with `remotes` (RemoteStrategy) joining in"""
+    strategies = load_strategies() + list(remotes)
+    results = {s.__name__: 0 for s in strategies}
+    match_data = []
+
+    print(f"loaded {len(strategies)} strategies:")
+    for s in strategies:
+        print("  -", s.__name__ + (" (remote)" if isinstance(s, RemoteStrategy) else ""))
+
+    matchups = pairings(strategies)
+    scores = asyncio.run(play_mixed_pairings(matchups, rounds, workers=workers, seed=seed,
+                                             max_in_flight=max_in_flight, game=game,
+                                             move_timeout=move_timeout, default_move=default_move))
+
+    for (S1, S2), (score1, score2) in zip(matchups, scores):
+        record_match(results, match_data, S1, S2, score1, score2)
+
+    if save:
+        save_results(rounds, match_data, results, results_folder(game) / "remote")
+
+    print_rankings(results)
+    return results
+
+
+if __name__ == "__main__":
+    # each argument is NAME=COMMAND, e.g. "TitForTatBot=python stub_bot.py"
+    remotes = []
+    for arg in sys.argv[1:]:
+        name, _, command = arg.partition("=")
+        if not command:
+            raise SystemExit(f"expected NAME=COMMAND, got {arg!r}")
+        remotes.append(RemoteStrategy(name, shlex.split(command)))
+
+    run_tournament(rounds=100, remotes=remotes, save=True, seed=0)
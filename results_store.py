@@ -0,0 +1,269 @@
+"""
+Columnar, append-only store for tournament results.
+
+Instead of one CSV per round count, every tournament run is appended to a
+few flat binary files of fixed-size records plus a JSON manifest:
+
+    store/
+        manifest.json   strategy names, one entry per run (round count,
+                        seed, game, record ranges)
+        matches.bin     one MATCH_DTYPE record per match
+        totals.bin      one TOTAL_DTYPE record per strategy per run, with
+                        the sha256 of the source the strategy ran with
+
+Readers memory-map the .bin files, so loading a whole sweep is a couple of
+np.memmap calls and selecting runs is slicing. The manifest is only
+rewritten after the records are on disk, so it is the commit point: any
+half-written records from a crashed append are ignored and overwritten.
+
+Scores are float64, so games with fractional payoffs (and exact expected
+scores, see markov.py) are stored as they are; whole numbers come back out
+as ints. Runs of different games share the store and are told apart by
+their payoff table: the per-round-count readers take the game to read.
+
+export_csv writes the classic tournament_results_{N}rounds.csv files.
+"""
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from match_cache import strategy_hash
+from strategies.game import DEFAULT_GAME, GAMES, Game
+from tournament import results_folder, save_results
+
+STORE_DIR = Path("tournament_results") / "store"
+
+VERSION = 1
+
+MATCH_DTYPE = np.dtype([
+    ("run", "<i4"),
+    ("player1", "<i4"),
+    ("player2", "<i4"),
+    ("score1", "<f8"),
+    ("score2", "<f8"),
+])
+TOTAL_DTYPE = np.dtype([
+    ("run", "<i4"),
+    ("strategy", "<i4"),
+    ("total", "<f8"),
+    ("source_hash", "u1", (32,)),  # raw sha256 digest, all zeros when unknown
+])
+
+def _digest(source_hash):
+    # hex sha256 -> the 32 bytes stored in a record
+    if source_hash is None:
+        return np.zeros(32, dtype=np.uint8)
+    return np.frombuffer(bytes.fromhex(source_hash), dtype=np.uint8)
+
+
+def _hex(digest):
+    return bytes(digest).hex() if digest.any() else None
+
+
+def _number(value):
+    """A stored score as a plain int when it is whole, else a float"""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def _game_key(run):
+    # the payoff table, flattened like Game.key
+    return tuple(v for _, payoffs in sorted(run["points"]) for v in payoffs)
+
+
+class ResultsStore:
+    def __init__(self, directory=STORE_DIR):
+        self.directory = Path(directory)
+        self.manifest_path = self.directory / "manifest.json"
+        self.manifest = self._load_manifest()
+        if self.manifest["version"] != VERSION:
+            raise ValueError(f"{self.manifest_path}: unsupported store version {self.manifest['version']} "
+                             f"(expected {VERSION})")
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"version": VERSION, "strategies": [], "runs": [], "matches": 0, "totals": 0}
+
+    def _save_manifest(self):
+        tmp = self.manifest_path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(tmp, self.manifest_path)
+
+    @property
+    def strategy_names(self):
+        return [s["name"] for s in self.manifest["strategies"]]
+
+    @property
+    def runs(self):
+        return self.manifest["runs"]
+
+    def _strategy_id(self, name):
+        names = self.strategy_names
+        if name in names:
+            return names.index(name)
+        self.manifest["strategies"].append({"name": name})
+        return len(names)
+
+    def _append(self, filename, records, committed):
+        # drop anything past the last committed record before appending
+        path = self.directory / filename
+        with open(path, "ab") as f:
+            f.truncate(committed * records.dtype.itemsize)
+            f.write(records.tobytes())
+
+    def append_run(self, rounds, match_data, results, strategies=(), seed=None, game=DEFAULT_GAME):
+        """
+        Append one tournament run.
+
+        match_data and results are what run_tournament builds; `strategies`
+        are the classes that played, used to record their source hashes.
+        Returns the new run id.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        hashes = {S.__name__: strategy_hash(S) for S in strategies}
+        run_id = len(self.runs)
+
+        matches = np.zeros(len(match_data), dtype=MATCH_DTYPE)
+        for k, row in enumerate(match_data):
+            matches[k] = (
+                run_id,
+                self._strategy_id(row["Player 1"]),
+                self._strategy_id(row["Player 2"]),
+                row["Score 1"],
+                row["Score 2"],
+            )
+
+        totals = np.zeros(len(results), dtype=TOTAL_DTYPE)
+        for k, (name, total) in enumerate(results.items()):
+            totals[k] = (run_id, self._strategy_id(name), total, _digest(hashes.get(name)))
+
+        self._append("matches.bin", matches, self.manifest["matches"])
+        self._append("totals.bin", totals, self.manifest["totals"])
+
+        self.runs.append({
+            "run": run_id,
+            "rounds": rounds,
+            "seed": seed,
+            "game": game.name,
+            "points": game.payoff_table(),
+            "match_start": self.manifest["matches"],
+            "match_count": len(matches),
+            "total_start": self.manifest["totals"],
+            "total_count": len(totals),
+        })
+        self.manifest["matches"] += len(matches)
+        self.manifest["totals"] += len(totals)
+        self._save_manifest()
+        return run_id
+
+    def _map(self, filename, dtype, count):
+        if count == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(self.directory / filename, dtype=dtype, mode="r", shape=(count,))
+
+    def matches(self):
+        """Every committed match record, as a read-only memory-mapped array"""
+        return self._map("matches.bin", MATCH_DTYPE, self.manifest["matches"])
+
+    def totals(self):
+        """Every committed per-strategy total, as a read-only memory-mapped array"""
+        return self._map("totals.bin", TOTAL_DTYPE, self.manifest["totals"])
+
+    def run_matches(self, run_id):
+        run = self.runs[run_id]
+        return self.matches()[run["match_start"]:run["match_start"] + run["match_count"]]
+
+    def run_totals(self, run_id):
+        run = self.runs[run_id]
+        return self.totals()[run["total_start"]:run["total_start"] + run["total_count"]]
+
+    def run_game(self, run_id):
+        """The Game a run was played in"""
+        run = self.runs[run_id]
+        key = _game_key(run)
+        for game in GAMES.values():
+            if game.key == key:
+                return game
+        return Game(np.reshape(key, (2, 2, 2)), name=run["game"])
+
+    def games(self):
+        """Every game with runs in the store, in order of first appearance"""
+        games = {}
+        for run in self.runs:
+            key = _game_key(run)
+            if key not in games:
+                games[key] = self.run_game(run["run"])
+        return list(games.values())
+
+    def source_hashes(self, run_id):
+        """strategy name -> sha256 of the source it played run `run_id` with (None if unknown)"""
+        names = self.strategy_names
+        return {names[t["strategy"]]: _hex(t["source_hash"]) for t in self.run_totals(run_id)}
+
+    def latest_runs(self, game=DEFAULT_GAME):
+        """round count -> id of the most recent run of `game` with that round count"""
+        return {run["rounds"]: run["run"] for run in self.runs if _game_key(run) == game.key}
+
+    def totals_by_round(self, game=DEFAULT_GAME):
+        """
+        Final scores of the latest run of `game` for every round count.
+
+        Returns:
+            rounds: int array, ascending
+            table: float array of shape (len(rounds), strategies), NaN where
+                   a strategy didn't play; columns follow strategy_names
+        """
+        latest = self.latest_runs(game)
+        rounds = np.array(sorted(latest), dtype=np.int64)
+        table = np.full((len(rounds), len(self.strategy_names)), np.nan)
+        totals = self.totals()
+        for row, n in enumerate(rounds):
+            run = self.runs[latest[n]]
+            chunk = totals[run["total_start"]:run["total_start"] + run["total_count"]]
+            table[row, chunk["strategy"]] = chunk["total"]
+        return rounds, table
+
+    def scores_by_round(self, game=DEFAULT_GAME):
+        """Same shape of result as graph_results.load_scores_by_round, for one game"""
+        rounds, table = self.totals_by_round(game)
+        scores = {}
+        for col, name in enumerate(self.strategy_names):
+            by_round = {int(n): _number(v) for n, v in zip(rounds, table[:, col]) if not np.isnan(v)}
+            if by_round:
+                scores[name] = by_round
+        return [int(n) for n in rounds], scores
+
+    def export_csv(self, run_id, folder=None):
+        """
+        Write one run as a classic tournament_results_{N}rounds.csv file, by
+        default in the results folder of the run's game
+        """
+        if folder is None:
+            folder = results_folder(self.run_game(run_id))
+        names = self.strategy_names
+        match_data = [
+            {
+                "Player 1": names[m["player1"]],
+                "Player 2": names[m["player2"]],
+                "Score 1": _number(m["score1"]),
+                "Score 2": _number(m["score2"]),
+            }
+            for m in self.run_matches(run_id)
+        ]
+        results = {names[t["strategy"]]: _number(t["total"]) for t in self.run_totals(run_id)}
+        save_results(self.runs[run_id]["rounds"], match_data, results, folder=folder)
+
+
+if __name__ == "__main__":
+    # export the latest run of every round count of every game as CSV
+    store = ResultsStore()
+    for game in store.games():
+        for rounds, run_id in sorted(store.latest_runs(game).items()):
+            store.export_csv(run_id)
+            print(f"exported {game.slug}, {rounds} rounds (run {run_id})")
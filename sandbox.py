@@ -0,0 +1,579 @@
+"""
+Tournaments with every strategy running in its own worker process, under a
+time budget.
+
+Each strategy gets one worker process, which holds that strategy's player
+instances for every match it is in. Matches are played side by side, up to
+`max_in_flight` at a time, and advance one round together: a round is one
+batch per worker, carrying that worker's move requests for every match in
+flight (each with the previous round's result, so record_result never
+needs a message of its own), and one reply per batch. Workers think in
+parallel, and the per-message cost is paid once per worker per round
+instead of once per move.
+
+Two budgets are enforced, measured as wall time:
+
+    move_budget    seconds a single move() may take
+    match_budget   seconds a player may spend over a whole match
+
+Inside a batch the worker times every request itself and marks which one it
+is working on in shared memory, so a request that runs over is caught
+mid-batch and blamed on the right match, not on the requests queued behind
+it.
+
+A player that overruns either budget, crashes (raises, or takes its worker
+down with it, e.g. sys.exit()) or returns something other than 'C' / 'D' is
+handled by the `policy`:
+
+    "default"     the move is replaced by `default_move`. A stuck or dead
+                  worker is killed and restarted with every match it was
+                  playing replayed into fresh instances; after a
+                  match-budget overrun the rest of the match is played with
+                  `default_move`
+    "forfeit"     the match stops; the offender scores 0 for it and the
+                  opponent keeps its points plus the temptation payoff for
+                  every round left
+    "disqualify"  the strategy is removed from the tournament: its matches,
+                  played or not, don't count for anybody
+
+Every violation is recorded, printed and saved next to the results, and
+the tournament carries on either way.
+"""
+import csv
+import multiprocessing
+import multiprocessing.connection
+import random
+import time
+from pathlib import Path
+
+from seeding import derive_seed, match_seeds
+from strategies.game import DEFAULT_GAME
+from tournament import load_strategies, pairings, print_rankings, record_match, results_folder, save_results
+
+POLICIES = ("default", "forfeit", "disqualify")
+
+# allowance on top of a budget for scheduling and pipe latency
+GRACE = 0.02
+
+
+class Overrun(Exception):
+    """A sandboxed player broke its budget or misbehaved"""
+
+    def __init__(self, kind, detail=""):
+        super().__init__(kind, detail)
+        self.kind = kind
+        self.detail = detail
+
+    def __str__(self):
+        return f"{self.kind}: {self.detail}" if self.detail else self.kind
+
+
+class Disqualified(Exception):
+    def __init__(self, side, overrun):
+        super().__init__(side, overrun)
+        self.side = side
+        self.overrun = overrun
+
+
+def _worker(conn, S, progress):
+    # runs in the child process: every instance of S the tournament needs,
+    # keyed by (match, side). progress holds (request being worked on, when
+    # it started) for the tournament to check on
+    players = {}
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message[0] == "stop":
+            return
+
+        results = []
+        for i, request in enumerate(message[1]):
+            progress[1] = time.monotonic()
+            progress[0] = i
+            kind, key = request[0], request[1]
+            start = time.perf_counter()
+            try:
+                if kind == "new":
+                    _, _, side, rounds, match_seed, history, game = request
+                    player = players[key] = S()
+                    player.game = game
+                    if match_seed is not None:
+                        # the same stream tournament.seed_players would give this side
+                        player.rng = random.Random(derive_seed(match_seed, side))
+                    if hasattr(player, "total_rounds"):
+                        player.total_rounds = rounds
+                    for my_move, opponent_move in history:
+                        player.record_result(my_move, opponent_move)
+                    result = ("ok", None)
+                elif kind == "move":
+                    player = players.get(key)
+                    if player is None:
+                        # its instance was lost with a previous process and
+                        # couldn't be rebuilt
+                        results.append(("gone", None, 0.0))
+                        continue
+                    for my_move, opponent_move in request[2]:
+                        player.record_result(my_move, opponent_move)
+                    result = ("move", player.move())
+                else:  # "end"
+                    players.pop(key, None)
+                    result = ("ok", None)
+            except Exception as e:  # the strategy's fault, reported to the tournament
+                result = ("error", f"{type(e).__name__}: {e}")
+            results.append(result + (time.perf_counter() - start,))
+        progress[0] = len(results)
+        conn.send(("done", results))
+
+
+class Seat:
+    """One side of one match, played by an instance in its strategy's worker"""
+
+    def __init__(self, match, side, S, rounds, match_seed, game):
+        self.match, self.side, self.S = match, side, S
+        self.key = (match.number, side)
+        self.rounds, self.match_seed, self.game = rounds, match_seed, game
+        self.history = []   # (my move, opponent's move) every round
+        self.synced = 0     # how much of the history the worker's instance has seen
+        self.spent = 0.0
+        self.ready = False  # the instance is set up
+        self.defaulted = False
+
+    def request(self, kind):
+        """The message for a request of `kind` ("new", "move" or "end")"""
+        if kind == "new":
+            self.synced = len(self.history)
+            return ("new", self.key, self.side, self.rounds, self.match_seed, self.history, self.game)
+        if kind == "move":
+            unseen, self.synced = self.history[self.synced:], len(self.history)
+            return ("move", self.key, unseen)
+        return ("end", self.key)
+
+
+class Match:
+    def __init__(self, number, S1, S2, rounds, match_seed, game):
+        self.number = number
+        self.seats = (Seat(self, 1, S1, rounds, match_seed, game),
+                      Seat(self, 2, S2, rounds, match_seed, game.swapped()))
+        self.rounds = rounds
+        self.round_num = 0
+        self.totals = [0, 0]
+        self.result = None
+        self.done = False
+
+
+class Worker:
+    """The process playing every instance of strategy S"""
+
+    def __init__(self, S, context):
+        self.S = S
+        self.context = context
+        self.seats = set()  # seats of matches in flight
+        self.process = None
+        self._spawn()
+
+    def _spawn(self):
+        self.conn, child = self.context.Pipe()
+        self.progress = self.context.RawArray("d", 2)
+        self.process = self.context.Process(target=_worker, args=(child, self.S, self.progress), daemon=True)
+        self.process.start()
+        child.close()
+
+    def kill(self):
+        if self.process is not None:
+            self.process.kill()
+            self.process.join()
+            self.conn.close()
+            self.process = None
+
+    def respawn(self):
+        exitcode = self.process.exitcode if self.process is not None else None
+        self.kill()
+        self._spawn()
+        return exitcode
+
+    def close(self):
+        if self.process is not None:
+            try:
+                self.conn.send(("stop",))
+            except OSError:
+                pass
+            self.process.join(timeout=1)
+            self.kill()
+
+    def send(self, requests):
+        """Send one batch; False if the worker is already gone"""
+        self.progress[0] = -1  # nothing started yet
+        try:
+            self.conn.send(("batch", requests))
+        except OSError:
+            return False
+        return True
+
+
+class Batch:
+    def __init__(self, requests, allowances):
+        self.requests = requests      # [(kind, seat)]
+        self.allowances = allowances  # seconds each request may take
+        self.sent = None
+
+    def deadline(self, worker):
+        """When the request the worker is on runs out of time"""
+        i = int(worker.progress[0])
+        if i >= len(self.requests):
+            return None  # all done, the reply is on its way
+        if i < 0:
+            return self.sent + self.allowances[0] + GRACE
+        started = max(worker.progress[1], self.sent)
+        return started + self.allowances[i] + GRACE
+
+
+class Sandbox:
+    """
+    Worker processes for a tournament, one per strategy, reused from match
+    to match.
+    """
+
+    def __init__(self, move_budget=1.0, match_budget=None, policy="default", default_move="D",
+                 game=DEFAULT_GAME, max_in_flight=64):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy: {policy} (expected one of {', '.join(POLICIES)})")
+        if default_move not in ("C", "D"):
+            raise ValueError(f"Invalid default move: {default_move}")
+        self.move_budget = move_budget
+        self.match_budget = match_budget
+        self.policy = policy
+        self.default_move = default_move
+        self.game = game
+        self.max_in_flight = max_in_flight
+        self.context = multiprocessing.get_context()
+        self.workers = {}
+        self.violations = []
+        self.disqualified = {}  # strategy -> the Overrun that got it disqualified
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for worker in self.workers.values():
+            worker.close()
+        self.workers.clear()
+
+    def worker(self, S):
+        if S not in self.workers:
+            self.workers[S] = Worker(S, self.context)
+        return self.workers[S]
+
+    def _allowance(self, seat):
+        if self.match_budget is None:
+            return self.move_budget
+        return max(0.0, min(self.move_budget, self.match_budget - seat.spent))
+
+    # --- one round of batches -------------------------------------------------
+
+    def _run(self, requests):
+        """
+        Send every worker its batch of (kind, seat) requests and collect
+        the outcomes: {(kind, seat): answer or Overrun}. Requests that
+        finish over their allowance come back as an Overrun "timeout"; a
+        worker that hangs past a request's allowance or dies is killed,
+        restarted with its matches replayed, and sent whatever it hadn't
+        answered yet.
+        """
+        batches = {}
+        for kind, seat in requests:
+            batches.setdefault(self.worker(seat.S), []).append((kind, seat))
+
+        outcomes = {}
+        waiting = {}  # conn -> (worker, Batch)
+        for worker, batch in batches.items():
+            self._send(worker, batch, waiting, outcomes)
+
+        while waiting:
+            now = time.monotonic()
+            deadlines = {conn: batch.deadline(worker) for conn, (worker, batch) in waiting.items()}
+            expired = [conn for conn, deadline in deadlines.items() if deadline is not None and deadline <= now]
+            if expired:
+                for conn in expired:
+                    worker, batch = waiting.pop(conn)
+                    self._fail(worker, batch, Overrun("timeout"), waiting, outcomes)
+                continue  # resent batches have deadlines of their own
+
+            # wake at the next deadline to see how far every worker got
+            pending = [deadline for deadline in deadlines.values() if deadline is not None]
+            timeout = max(0.0, min(pending) - now) if pending else None
+            for conn in multiprocessing.connection.wait(list(waiting), timeout):
+                worker, batch = waiting.pop(conn)
+                try:
+                    _, results = conn.recv()
+                except (EOFError, OSError):
+                    worker.process.join(timeout=1)
+                    self._fail(worker, batch, Overrun("crash", f"worker exited with code {worker.process.exitcode}"),
+                               waiting, outcomes)
+                    continue
+                for (kind, seat), allowance, (status, value, seconds) in zip(batch.requests, batch.allowances, results):
+                    outcomes[(kind, seat)] = self._outcome(kind, seat, allowance, status, value, seconds)
+        return outcomes
+
+    def _send(self, worker, batch, waiting, outcomes):
+        batch = Batch(batch, [self._allowance(seat) for _, seat in batch])
+        if not worker.send([seat.request(kind) for kind, seat in batch.requests]):
+            # died between batches: nobody to blame, just bring it back
+            self._fail(worker, batch, None, waiting, outcomes)
+            return
+        batch.sent = time.monotonic()
+        waiting[worker.conn] = (worker, batch)
+
+    def _outcome(self, kind, seat, allowance, status, value, seconds):
+        if kind == "end" or status == "gone":
+            return None
+        seat.spent += seconds
+        if status == "error":
+            return Overrun("error", value)
+        if seconds > allowance + GRACE:
+            return Overrun("timeout", f"took {seconds:.3f}s of {allowance:.3f}s")
+        if kind == "new":
+            seat.ready = True
+            return None
+        if value not in ("C", "D"):
+            return Overrun("invalid move", repr(value))
+        return value
+
+    def _fail(self, worker, batch, overrun, waiting, outcomes):
+        """
+        `worker` hung or died in the middle of `batch`: blame the request it
+        was on (if `overrun` is given), restart it, rebuild every instance
+        it had and resend the rest of the batch.
+        """
+        requests = list(batch.requests)
+        if overrun is not None:
+            i = min(max(int(worker.progress[0]), 0), len(requests) - 1)
+            kind, seat = requests.pop(i)
+            if overrun.kind == "timeout":
+                seconds = time.monotonic() - max(worker.progress[1], batch.sent)
+                seat.spent += seconds
+                overrun.detail = f"no answer within {batch.allowances[i]:.3f}s"
+            outcomes[(kind, seat)] = overrun
+        worker.respawn()
+
+        # everything the old process knew is gone: set the instances up again
+        # from their histories, then retry what wasn't answered
+        rebuild = [("new", seat) for seat in worker.seats if seat.ready and not seat.defaulted]
+        retry = [(kind, seat) for kind, seat in requests if kind != "end"
+                 and not (kind == "new" and seat.ready)]
+        for seat in worker.seats:
+            seat.ready = False
+        if rebuild or retry:
+            self._send(worker, rebuild + retry, waiting, outcomes)
+
+    # --- matches ------------------------------------------------------------
+
+    def _violation(self, seat, round_num, overrun):
+        self.violations.append({
+            "Strategy": seat.S.__name__,
+            "Opponent": seat.match.seats[2 - seat.side].S.__name__,
+            "Round": round_num + 1,
+            "Kind": overrun.kind,
+            "Detail": overrun.detail,
+            "Policy": self.policy,
+        })
+
+    def _handle(self, seat, round_num, overrun):
+        """
+        Record a violation and apply the policy; True if the match is over
+        because of it.
+        """
+        self._violation(seat, round_num, overrun)
+        match = seat.match
+        if self.policy == "disqualify":
+            if seat.S not in self.disqualified:
+                self.disqualified[seat.S] = overrun
+                print(f"disqualified {seat.S.__name__}: {overrun}")
+            return True
+        if self.policy == "forfeit":
+            match.result = self._forfeit(seat.side, match.totals[0], match.totals[1], match.rounds - round_num)
+            return True
+        return False
+
+    def _forfeit(self, side, total1, total2, rounds_left):
+        # the offender scores nothing; the opponent is paid as if it defected
+        # against a cooperator for the rest of the match
+        if side == 1:
+            return 0, total2 + self.game.points[('C', 'D')][1] * rounds_left
+        return total1 + self.game.points[('D', 'C')][0] * rounds_left, 0
+
+    def _setup(self, match, outcomes):
+        for seat in match.seats:
+            overrun = outcomes.get(("new", seat))
+            if overrun is None:
+                continue
+            if overrun.kind == "timeout":
+                overrun.kind = "move budget"
+            # a strategy that can't even be set up plays default moves
+            if self._handle(seat, 0, overrun):
+                match.done = True
+                return
+            seat.defaulted = True
+
+    def _play_round(self, match, outcomes):
+        moves = []
+        for seat in match.seats:
+            if seat.defaulted:
+                moves.append(self.default_move)
+                continue
+            answer = outcomes.get(("move", seat))
+            if isinstance(outcomes.get(("new", seat)), Overrun):
+                # its worker was restarted and this instance couldn't be
+                # rebuilt: default moves from here on, as after a match-budget
+                # overrun
+                seat.defaulted = True
+            if answer is None:
+                moves.append(self.default_move)
+            elif isinstance(answer, Overrun):
+                overrun = answer
+                out_of_time = self.match_budget is not None and seat.spent >= self.match_budget - 1e-6
+                if overrun.kind == "timeout":
+                    overrun.kind = "match budget" if out_of_time else "move budget"
+                if self._handle(seat, match.round_num, overrun):
+                    match.done = True
+                    return
+                moves.append(self.default_move)
+                if out_of_time:
+                    seat.defaulted = True  # no time left for the rest of the match
+            else:
+                moves.append(answer)
+
+        r1, r2 = self.game.lookup[moves[0]][moves[1]]
+        match.totals[0] += r1
+        match.totals[1] += r2
+        match.seats[0].history.append((moves[0], moves[1]))
+        match.seats[1].history.append((moves[1], moves[0]))
+        match.round_num += 1
+        if match.round_num == match.rounds:
+            match.result = tuple(match.totals)
+            match.done = True
+
+    def play_games(self, matchups, rounds=100, seeds=None):
+        """
+        Play every (S1, S2) pairing in the sandbox, up to max_in_flight at
+        once. Returns the (score1, score2) of every pairing in `matchups`
+        order, None for matches that don't count because one side got
+        disqualified.
+        """
+        if seeds is None:
+            seeds = [None] * len(matchups)
+        queue = [Match(k, S1, S2, rounds, s, self.game) for k, ((S1, S2), s) in enumerate(zip(matchups, seeds))]
+        queue.reverse()
+        in_flight = []
+        results = [None] * len(matchups)
+        ending = []
+
+        while queue or in_flight:
+            starting = []
+            while queue and len(in_flight) + len(starting) < self.max_in_flight:
+                match = queue.pop()
+                if any(seat.S in self.disqualified for seat in match.seats):
+                    continue
+                for seat in match.seats:
+                    self.worker(seat.S).seats.add(seat)
+                starting.append(match)
+
+            requests = [("end", seat) for seat in ending]
+            requests += [("new", seat) for match in starting for seat in match.seats]
+            requests += [("move", seat) for match in in_flight for seat in match.seats if not seat.defaulted]
+            ending = []
+            outcomes = self._run(requests)
+
+            for match in in_flight:
+                self._play_round(match, outcomes)
+            for match in starting:
+                self._setup(match, outcomes)
+
+            still = []
+            for match in in_flight + starting:
+                if any(seat.S in self.disqualified for seat in match.seats):
+                    match.done, match.result = True, None
+                if match.done:
+                    results[match.number] = match.result
+                    for seat in match.seats:
+                        self.worker(seat.S).seats.discard(seat)
+                        ending.append(seat)
+                else:
+                    still.append(match)
+            in_flight = still
+
+        if ending:
+            self._run([("end", seat) for seat in ending])
+        return results
+
+    def play_game(self, S1, S2, rounds=100, match_seed=None):
+        """
+        Play one match in the sandbox and return (score1, score2).
+        Raises Disqualified under the "disqualify" policy.
+        """
+        score = self.play_games([(S1, S2)], rounds, [match_seed])[0]
+        if score is None:
+            side = 1 if S1 in self.disqualified else 2
+            raise Disqualified(side, self.disqualified[S1 if side == 1 else S2])
+        return score
+
+
+def save_violations(rounds, violations, folder=Path("tournament_results") / "sandbox"):
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    with open(folder / f"sandbox_violations_{rounds}rounds.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["Strategy", "Opponent", "Round", "Kind", "Detail", "Policy"])
+        writer.writeheader()
+        writer.writerows(violations)
+
+
+def run_sandboxed_tournament(rounds=100, save=True, seed=None, move_budget=1.0, match_budget=None,
+                             policy="default", default_move="D", strategies=None, game=DEFAULT_GAME,
+                             max_in_flight=64):
+    """
+    Same as tournament.run_tournament, but every strategy runs in a worker
+    process under the given budgets (see the module docstring). Results and
+    violations are saved under tournament_results/sandbox/, apart from the
+    regular results.
+    """
+    if strategies is None:
+        strategies = load_strategies()
+
+    budget = "no match budget" if match_budget is None else f"match budget {match_budget}s"
+    print(f"loaded {len(strategies)} strategies, sandboxed "
+          f"(move budget {move_budget}s, {budget}, policy {policy}):")
+    for s in strategies:
+        print("  -", s.__name__)
+
+    matchups = pairings(strategies)
+    with Sandbox(move_budget, match_budget, policy, default_move, game, max_in_flight) as sandbox:
+        scores = sandbox.play_games(matchups, rounds, match_seeds(matchups, seed))
+        violations = sandbox.violations
+        disqualified = set(sandbox.disqualified)
+
+    remaining = [s for s in strategies if s not in disqualified]
+    results = {s.__name__: 0 for s in remaining}
+    match_data = []
+    for (S1, S2), score in zip(matchups, scores):
+        if score is not None and S1 not in disqualified and S2 not in disqualified:
+            record_match(results, match_data, S1, S2, *score)
+
+    if save:
+        folder = results_folder(game) / "sandbox"
+        save_results(rounds, match_data, results, folder)
+        save_violations(rounds, violations, folder)
+
+    print_rankings(results)
+    if violations:
+        print(f"{len(violations)} budget violations:")
+        for v in violations:
+            print(f"  {v['Strategy']} vs {v['Opponent']}, round {v['Round']}: {v['Kind']} {v['Detail']}")
+    return results, violations
+
+
+if __name__ == "__main__":
+    run_sandboxed_tournament(rounds=100, save=True, seed=0, move_budget=0.5, match_budget=10.0)
@@ -0,0 +1,46 @@
+"""
+Per-match random streams for stochastic strategies.
+
+Every match gets its own seed, derived from a root seed and a spawn key
+naming the match, in the spirit of numpy's SeedSequence.spawn. The same root
+seed always gives a match the same stream, whether the tournament runs
+serially, across processes or comes out of the match cache. Different matches,
+and the two players within a match, get independent streams.
+"""
+import hashlib
+import random
+
+
+def derive_seed(seed, *spawn_key):
+    """A 128-bit seed for the child of `seed` named by `spawn_key`"""
+    data = repr((seed,) + spawn_key).encode("utf-8")
+    return int.from_bytes(hashlib.sha256(data).digest()[:16], "little")
+
+
+def match_seeds(matchups, seed):
+    """
+    One seed per (S1, S2) pairing, or all None when `seed` is None.
+
+    The spawn key is the pairing itself (plus a counter for repeated
+    pairings) rather than its position in the list, so adding a strategy
+    doesn't change the streams of every other match.
+    """
+    if seed is None:
+        return [None] * len(matchups)
+
+    seen = {}
+    seeds = []
+    for S1, S2 in matchups:
+        pair = (S1.__qualname__, S2.__qualname__)
+        repeat = seen.get(pair, 0)
+        seen[pair] = repeat + 1
+        seeds.append(derive_seed(seed, *pair, repeat))
+    return seeds
+
+
+def seed_players(p1, p2, match_seed):
+    """Give both players their own stream for this match (no-op without a seed)"""
+    if match_seed is None:
+        return
+    p1.rng = random.Random(derive_seed(match_seed, 1))
+    p2.rng = random.Random(derive_seed(match_seed, 2))
@@ -0,0 +1,104 @@
+"""
+Spatial tournament on a 2-D lattice.
+
+Every cell of a (toroidal) grid holds one strategy. Each generation every
+cell plays its eight neighbours, then takes on the strategy of the best
+scoring cell among itself and its neighbours (ties keep the current
+strategy). Pair payoffs come from a strategy x strategy table built once
+with ecological.payoff_matrix (for whichever game is being played), and a
+whole generation is a few shifted-array lookups and adds, so grids of a
+million cells are practical.
+"""
+import os
+
+import numpy as np
+
+from ecological import payoff_matrix
+from strategies.game import DEFAULT_GAME
+from tournament import load_strategies, results_folder
+
+# Moore neighbourhood: the eight surrounding cells
+NEIGHBOURS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+def random_grid(n_strategies, shape=(1000, 1000), seed=None):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, n_strategies, size=shape, dtype=np.int32)
+
+
+def neighbourhood_scores(grid, payoffs):
+    """Total payoff of every cell against its eight neighbours"""
+    n = payoffs.shape[0]
+    flat = payoffs.ravel()
+    row = grid * n  # offset of each cell's row in the flattened table
+    scores = np.zeros(grid.shape)
+    for dy, dx in NEIGHBOURS:
+        scores += flat[row + np.roll(grid, (dy, dx), axis=(0, 1))]
+    return scores
+
+
+def step(grid, payoffs):
+    """One generation: play the neighbours, then copy the best scorer nearby"""
+    scores = neighbourhood_scores(grid, payoffs)
+    best_scores = scores.copy()
+    new_grid = grid.copy()
+    for dy, dx in NEIGHBOURS:
+        their_scores = np.roll(scores, (dy, dx), axis=(0, 1))
+        better = their_scores > best_scores
+        best_scores[better] = their_scores[better]
+        new_grid[better] = np.roll(grid, (dy, dx), axis=(0, 1))[better]
+    return new_grid
+
+
+def run_spatial(grid, payoffs=None, generations=100, snapshot_every=10, snapshot_dir=None, names=None,
+                strategies=None, rounds=200, workers=None, seed=None, game=DEFAULT_GAME):
+    """
+    Evolve `grid` for `generations` generations.
+
+    `payoffs` is the strategy x strategy table; without one it is built
+    from `strategies` (all of them by default) playing `rounds`-round
+    matches of `game`.
+
+    Every `snapshot_every` generations (and at the end) the grid is saved to
+    snapshot_dir/gen_XXXXXX.npy, by default the game's results folder's
+    spatial/. Returns the final grid and an array of strategy counts per
+    generation, shape (generations + 1, strategies).
+    """
+    if payoffs is None:
+        if strategies is None:
+            strategies = load_strategies()
+        payoffs = payoff_matrix(strategies, rounds=rounds, workers=workers, seed=seed, game=game)
+        if names is None:
+            names = [s.__name__ for s in strategies]
+    if snapshot_dir is None:
+        snapshot_dir = os.path.join(results_folder(game), "spatial")
+
+    n = payoffs.shape[0]
+    if snapshot_every:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        if names is not None:
+            with open(os.path.join(snapshot_dir, "strategies.txt"), "w") as f:
+                f.write("\n".join(names) + "\n")
+
+    counts = [np.bincount(grid.ravel(), minlength=n)]
+    for g in range(1, generations + 1):
+        grid = step(grid, payoffs)
+        counts.append(np.bincount(grid.ravel(), minlength=n))
+        if snapshot_every and (g % snapshot_every == 0 or g == generations):
+            np.save(os.path.join(snapshot_dir, f"gen_{g:06d}.npy"), grid.astype(np.int16 if n < 2 ** 15 else np.int32))
+
+    return grid, np.array(counts)
+
+
+if __name__ == "__main__":
+    strategies = load_strategies()
+    names = [s.__name__ for s in strategies]
+
+    grid = random_grid(len(strategies), shape=(1000, 1000), seed=0)
+    grid, counts = run_spatial(grid, generations=200, snapshot_every=20, strategies=strategies, rounds=200,
+                               workers=os.cpu_count(), seed=0)
+
+    print("share of the grid after 200 generations:")
+    for k in np.argsort(counts[-1])[::-1]:
+        if counts[-1][k]:
+            print(f"{names[k]:25s} {counts[-1][k] / grid.size:.4f}")
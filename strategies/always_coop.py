@@ -2,5 +2,14 @@ from strategies.base_strategy import Strategy
 
 class AlwaysCoop(Strategy):
     """always cooperate"""
+    deterministic = True
+    memory_depth = 0  # never looks at past moves
+    memory_one = (1, 1, 1, 1)
+    memory_one_start = 1
+    state_table = [('C', 0, 0)]
+
+    def state_fingerprint(self):
+        return ()  # always the same
+
     def move(self):
         return 'C'  
\ No newline at end of file
@@ -2,5 +2,14 @@ from strategies.base_strategy import Strategy
 
 class AlwaysDefect(Strategy):
     """always defect"""
+    deterministic = True
+    memory_depth = 0  # never looks at past moves
+    memory_one = (0, 0, 0, 0)
+    memory_one_start = 0
+    state_table = [('D', 0, 0)]
+
+    def state_fingerprint(self):
+        return ()  # always the same
+
     def move(self):
         return 'D'  
\ No newline at end of file
@@ -1,7 +1,49 @@
+import random
+
+from strategies.game import DEFAULT_GAME
+from strategies.history import MoveHistory
+
+
 class Strategy:
+    # True if the strategy never uses randomness, so a pairing of two
+    # deterministic strategies always plays out the same way
+    deterministic = False
+
+    # where random strategies get their randomness. The engine gives each
+    # player of a seeded match its own random.Random; otherwise it's the
+    # global random module
+    rng = random
+
+    # the game being played, seen from this player's side (see game.py).
+    # The engine sets it per match; my_score / opponent_score and anything
+    # that reasons about payoffs should go through it
+    game = DEFAULT_GAME
+
+    # how many past moves the strategy ever looks at; None keeps the whole game.
+    # len() of the histories always counts every round, whatever the depth
+    memory_depth = None
+
+    # for memory-one strategies, the chance of cooperating after each
+    # (my last move, opponent's last move) of CC, CD, DC, DD, plus the chance
+    # of cooperating in the first round. Lets analyses solve the strategy
+    # as a Markov chain instead of playing it out
+    memory_one = None
+    memory_one_start = None
+
     def __init__(self):
-        self.my_history = []
-        self.opponent_history = []
+        self.my_history = MoveHistory(depth=self.memory_depth)
+        self.opponent_history = MoveHistory(depth=self.memory_depth)
+        self._reset_stats()
+
+    def _reset_stats(self):
+        # running totals over the current history, kept up to date by record_result
+        self.my_cooperations = 0
+        self.my_defections = 0
+        self.opponent_cooperations = 0
+        self.opponent_defections = 0
+        self.opponent_defection_streak = 0  # how many times in a row the opponent just defected
+        self.my_score = 0
+        self.opponent_score = 0
 
     def move(self):
         """
@@ -9,9 +51,45 @@ class Strategy:
         """
         raise NotImplementedError
 
+    def state_fingerprint(self):
+        """
+        Optional hook for deterministic strategies: return a hashable value
+        that captures everything deciding future moves, so that two equal
+        fingerprints mean identical play from then on against any opponent.
+        The engine uses it to spot cycles and skip ahead.
+
+        Return None (the default) if there is no such summary, e.g. the
+        strategy is random or depends on how many rounds are left.
+        """
+        return None
+
     def record_result(self, my_move, opponent_move):
         """
         Store what happened that round
         """
         self.my_history.append(my_move)
-        self.opponent_history.append(opponent_move)
\ No newline at end of file
+        self.opponent_history.append(opponent_move)
+
+        if my_move == 'C':
+            self.my_cooperations += 1
+        else:
+            self.my_defections += 1
+
+        if opponent_move == 'C':
+            self.opponent_cooperations += 1
+            self.opponent_defection_streak = 0
+        else:
+            self.opponent_defections += 1
+            self.opponent_defection_streak += 1
+
+        my_points, opponent_points = self.game.lookup[my_move][opponent_move]
+        self.my_score += my_points
+        self.opponent_score += opponent_points
+
+    def reset_history(self):
+        """
+        Forget every round played so far, counters included
+        """
+        self.my_history.clear()
+        self.opponent_history.clear()
+        self._reset_stats()
@@ -1,19 +1,44 @@
 from strategies.base_strategy import Strategy
 
+
+def _davis_table():
+    # states 0-10: cooperating through the opening, no defection seen yet
+    # states 11-21: cooperating through the opening, opponent has defected
+    # state 22: cooperate from here on, state 23: defect from here on
+    table = []
+    for k in range(11):
+        clean_next, seen_next = (k + 1, 12 + k) if k < 10 else (22, 23)
+        table.append(('C', clean_next, seen_next))
+    for k in range(11):
+        seen_next = 12 + k if k < 10 else 23
+        table.append(('C', seen_next, seen_next))
+    table.append(('C', 22, 23))
+    table.append(('D', 23, 23))
+    return table
+
+
 class Davis(Strategy):
     """Only cooperates for the first 10 rounds, then checks the opponent's move history — if the opponent has defected in that time, Davis will solely defect from then onwards. Otherwise, it will only cooperate."""
+    deterministic = True
+    memory_depth = 0  # only uses the running counters
+    # (move, next state if opponent cooperates, next state if opponent defects)
+    state_table = _davis_table()
+
     def __init__(self):
-        self.my_history = []
-        self.opponent_history = []   
+        super().__init__()
         self.round = 0
  
+    def state_fingerprint(self):
+        # past round 11 only the grudge matters
+        return min(self.round, 11), self.opponent_defections > 0
+
     def move(self):       
         if self.round < 11:
             self.round += 1
             return 'C'  # cooperate for the first 10 rounds
         else:
             self.round += 1
-            if 'D' in self.opponent_history:
+            if self.opponent_defections:
                 return 'D'  # if opponent ever defected, defect
             else:
                 return 'C'  # otherwise, cooperate
@@ -2,6 +2,17 @@ from strategies.base_strategy import Strategy
 
 class DefectTitForTat(Strategy):
     """starts with defect, then mimics opponent's last move"""
+    deterministic = True
+    memory_depth = 1  # only looks at the last move
+    memory_one = (1, 0, 1, 0)
+    memory_one_start = 0
+    # (move, next state if opponent cooperates, next state if opponent defects)
+    state_table = [('D', 1, 0), ('C', 1, 0)]
+
+    def state_fingerprint(self):
+        # the next move is all there is to it
+        return self.opponent_history[-1] if self.opponent_history else 'D'
+
     def move(self):
         if not self.opponent_history:
             return 'D'  # start with defect
@@ -1,11 +1,11 @@
 from strategies.base_strategy import Strategy
-import random
 
 class Feld(Strategy):
     """Starts with cooperation, then defects with a certain probability, which decreases over time."""
+    memory_depth = 1  # only looks at the last move
+
     def __init__(self):
-        self.my_history = []
-        self.opponent_history = []
+        super().__init__()
         self.probability = 1.0025
 
     def move(self):
@@ -18,7 +18,7 @@ class Feld(Strategy):
         if self.opponent_history[-1] == 'D': # opponent defected last round means defect
             return "D"
         else:
-            if random.random() > self.probability: # if opponent cooperated, cooperate based on probability
+            if self.rng.random() > self.probability: # if opponent cooperated, cooperate based on probability
                   return 'D'
             else:
                 return 'C'
\ No newline at end of file
@@ -2,10 +2,18 @@ from strategies.base_strategy import Strategy
 
 class Friedman(Strategy):
     """Starts by cooperating, but if the opponent ever defects, it will only defect onwards."""
+    deterministic = True
+    memory_depth = 0  # only uses the running counters
+    # (move, next state if opponent cooperates, next state if opponent defects)
+    state_table = [('C', 0, 1), ('D', 1, 1)]
+
+    def state_fingerprint(self):
+        return self.opponent_defections > 0
+
     def move(self):
         if not self.opponent_history:
             return 'C'  # start with cooperation
-        if 'D' in self.opponent_history:
+        if self.opponent_defections:
             return 'D'  # if opponent has defected before, always defect
         else:
             return 'C'  # otherwise, cooperate
@@ -0,0 +1,161 @@
+"""
+The game being played: two moves and a payoff for each pair of moves.
+
+Moves are encoded as small integers (C = 0, D = 1, the same codes
+MoveHistory stores), and the payoffs are a 2 x 2 x 2 table,
+
+    payoffs[move1, move2] = (payoff to player 1, payoff to player 2)
+
+kept as plain Python numbers (`values`, ints when every payoff is whole).
+Everything else is derived from them once, when the Game is made: `points`
+is the classic {('C', 'D'): (0, 5), ...} table and `lookup` is the same
+thing as nested dicts, lookup['C']['D'] == (0, 5), which is the cheapest
+way for the pure-Python engines to score a round. The NumPy engines get
+the table as an array from `payoffs`, built on first use, so importing
+this module (and every strategy with it) doesn't import NumPy.
+
+Strategies keep returning 'C' / 'D'; a Game only changes what the moves
+are worth. Every player sees the game from its own side: the engines give
+player 2 `game.swapped()`, so `lookup[my_move][opponent_move][0]` is
+always "my" payoff, whether or not the game is symmetric.
+"""
+MOVES = ('C', 'D')
+C, D = 0, 1
+MOVE_CODES = {'C': C, 'D': D}
+
+
+class Game:
+    def __init__(self, payoffs, name=None):
+        """
+        payoffs: array-like of shape (2, 2, 2) as above, or (2, 2) for a
+        symmetric game given as the row player's payoffs
+        """
+        values = payoffs.tolist() if hasattr(payoffs, "tolist") else payoffs
+        shape = _shape(values)
+        if shape == (2, 2):
+            values = [[[values[i][j], values[j][i]] for j in range(2)] for i in range(2)]
+        elif shape != (2, 2, 2):
+            raise ValueError(f"Payoffs must have shape (2, 2) or (2, 2, 2), not {'ragged' if shape is None else shape}")
+        flat = [float(v) for row in values for pair in row for v in pair]
+        # plain Python numbers, so scores add up as ints for integer games
+        number = int if all(v.is_integer() for v in flat) else float
+        flat = [number(v) for v in flat]
+
+        self.values = tuple(tuple(tuple(flat[4 * i + 2 * j:4 * i + 2 * j + 2]) for j in range(2)) for i in range(2))
+        self.name = name
+        self.points = {(a, b): tuple(self.values[i][j]) for i, a in enumerate(MOVES) for j, b in enumerate(MOVES)}
+        self.lookup = {a: {b: self.points[(a, b)] for b in MOVES} for a in MOVES}
+        self.key = tuple(flat)
+        self._payoffs = None
+        self._swapped = None
+
+    @property
+    def payoffs(self):
+        """The table as a read-only (2, 2, 2) int64 or float64 array"""
+        if self._payoffs is None:
+            import numpy as np
+
+            dtype = np.int64 if isinstance(self.key[0], int) else np.float64
+            self._payoffs = np.array(self.values, dtype=dtype)
+            self._payoffs.flags.writeable = False
+        return self._payoffs
+
+    @classmethod
+    def symmetric(cls, R, S, T, P, name=None):
+        """
+        A symmetric game from its reward, sucker, temptation and punishment
+        payoffs (the row player's payoffs for CC, CD, DC and DD)
+        """
+        return cls([[R, S], [T, P]], name=name)
+
+    @property
+    def R(self):
+        return self.points[('C', 'C')][0]
+
+    @property
+    def S(self):
+        return self.points[('C', 'D')][0]
+
+    @property
+    def T(self):
+        return self.points[('D', 'C')][0]
+
+    @property
+    def P(self):
+        return self.points[('D', 'D')][0]
+
+    def is_symmetric(self):
+        return all(self.values[i][j][0] == self.values[j][i][1] for i in range(2) for j in range(2))
+
+    def swapped(self):
+        """The same game seen from player 2's side"""
+        if self._swapped is None:
+            if self.is_symmetric():
+                self._swapped = self
+            else:
+                # player 2's move first, and player 2's payoff first
+                values = tuple(tuple(self.values[j][i][::-1] for j in range(2)) for i in range(2))
+                self._swapped = Game(values, name=self.name)
+                self._swapped._swapped = self
+        return self._swapped
+
+    @property
+    def slug(self):
+        """A file-name friendly label: the name, or the payoffs spelled out"""
+        if self.name:
+            return self.name
+        return "game_" + "_".join(f"{v:g}" for v in self.key)
+
+    def payoff_table(self):
+        """The payoffs as JSON-friendly [[move1, move2], [payoff1, payoff2]] pairs"""
+        return sorted([list(k), list(v)] for k, v in self.points.items())
+
+    def score(self, move1, move2):
+        """(payoff 1, payoff 2) for a pair of 'C' / 'D' moves"""
+        try:
+            return self.lookup[move1][move2]
+        except (KeyError, TypeError):
+            raise ValueError(f"Invalid move: {move1!r}, {move2!r}") from None
+
+    # games never change, so copies of a player (e.g. for sweep branches)
+    # can share theirs
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        # pickles small, for the per-pairing jobs sent to worker processes
+        return Game, (self.values, self.name)
+
+    def __eq__(self, other):
+        return isinstance(other, Game) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        if self.name:
+            return f"Game({self.name!r})"
+        return f"Game({self.values!r})"
+
+
+def _shape(values):
+    # the shape of a nested list, like ndarray.shape; None if it is ragged
+    if not isinstance(values, (list, tuple)):
+        return ()
+    shapes = {_shape(v) for v in values}
+    if len(shapes) > 1 or None in shapes:
+        return None
+    return (len(values),) + (shapes.pop() if shapes else ())
+
+
+PRISONERS_DILEMMA = Game.symmetric(R=3, S=0, T=5, P=1, name="prisoners_dilemma")
+STAG_HUNT = Game.symmetric(R=4, S=0, T=3, P=2, name="stag_hunt")
+CHICKEN = Game.symmetric(R=3, S=1, T=5, P=0, name="chicken")
+
+GAMES = {game.name: game for game in (PRISONERS_DILEMMA, STAG_HUNT, CHICKEN)}
+
+# what everything plays unless told otherwise
+DEFAULT_GAME = PRISONERS_DILEMMA
@@ -7,6 +7,9 @@ class GraaskampStrategy(Strategy):
     then analyzes opponent's behavior to decide whether to cooperate or defect
     based on their cooperation rate.
     """
+    deterministic = True
+    memory_depth = 1  # only looks at the last move
+
     def move(self):
         if not self.my_history:
             return 'C'
@@ -17,14 +20,14 @@ class GraaskampStrategy(Strategy):
         if len(self.my_history) <= 55:
             return self.opponent_history[-1]
         else:
-            return self.check_strategy(self.opponent_history)
+            return self.check_strategy()
 
 
-    def check_strategy(self, opponent_history):
+    def check_strategy(self):
         """check opponent strategy, if it seems to be a nice algorithm
         or itself, cooperate --- check history to see this
         if it seems to be random, defect"""
-        coop_rate = opponent_history.count('C') / len(opponent_history)
+        coop_rate = self.opponent_cooperations / len(self.opponent_history)
         if coop_rate > 0.8:
             return 'C'
         else:
@@ -1,7 +1,10 @@
-import random
 from strategies.base_strategy import Strategy
 
 class GrofmanStrategy(Strategy):
+    memory_depth = 1  # only looks at the last move
+    memory_one = (1, 2/7, 2/7, 1)  # 2/7 after the players did different things
+    memory_one_start = 1
+
     def move(self):
         """
         start with cooperating
@@ -11,7 +14,7 @@ class GrofmanStrategy(Strategy):
         if not self.opponent_history:
             return 'C'
         if self.my_history[-1] != self.opponent_history[-1]:
-            if random.random() < 2/7:
+            if self.rng.random() < 2/7:
                 return 'C' 
             else:
                 return 'D'
@@ -2,8 +2,16 @@ from strategies.base_strategy import Strategy
 
 class Grudger(Strategy):
     """Cooperates until the opponent defects, then defects forever."""
+    deterministic = True
+    memory_depth = 0  # only uses the running counters
+    # (move, next state if opponent cooperates, next state if opponent defects)
+    state_table = [('C', 0, 1), ('D', 1, 1)]
+
+    def state_fingerprint(self):
+        return self.opponent_defections > 0
+
     def move(self):       
-        if 'D' in self.opponent_history:
+        if self.opponent_defections:
             return 'D'  # if opponent ever defected, defect
         else:
             return 'C'  # otherwise, cooperate
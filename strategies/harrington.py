@@ -1,4 +1,3 @@
-import random
 from strategies.base_strategy import Strategy
 
 class HarringtonStrategy(Strategy):
@@ -8,6 +7,8 @@ class HarringtonStrategy(Strategy):
     it explores cooperation probabilistically based on this belief. The belief
     increases when the opponent cooperates and decreases when they defect.
     """
+    memory_depth = 1  # only looks at the last move
+
     def __init__(self, initial_belief=0.5, belief_step=0.1, min_belief_to_cooperate=0.3):
         super().__init__()
         self.belief = initial_belief  # how sure we are that the opponent is patient (likely to cooperate long-term)
@@ -35,7 +36,7 @@ class HarringtonStrategy(Strategy):
 
         # otherwise, cooperate with a probability equal to belief
         coop_prob = self.belief
-        if random.random() < coop_prob:
+        if self.rng.random() < coop_prob:
             return 'C'
         else:
             return 'D'
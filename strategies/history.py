@@ -0,0 +1,139 @@
+_CODES = {'C': 0, 'D': 1}
+_MOVES = 'CD'
+_DECODE = bytes.maketrans(b'\x00\x01', b'CD')
+
+
+class MoveHistory:
+    """
+    A list-like record of 'C'/'D' moves stored one byte per move
+    (0 = cooperate, 1 = defect) instead of a list of strings.
+
+    Supports what strategies use on plain lists: indexing and slicing,
+    len, `in`, count, iteration, reversed, append and clear.
+
+    With `depth=k` only the last k moves are kept, in a ring buffer.
+    len() still counts every move appended since the last clear, so
+    round counters like `len(self.my_history)` keep working, but only
+    the kept moves can be indexed, counted or iterated over. Slices are
+    clipped to the kept moves (h[-5:] with depth 1 is the last move), and
+    equality compares kept moves, so h == list(h) always holds.
+    """
+    __slots__ = ("depth", "_buf", "_length")
+
+    def __init__(self, moves=(), depth=None):
+        self.depth = depth
+        self._buf = bytearray(16 if depth is None else depth)
+        self._length = 0
+        for move in moves:
+            self.append(move)
+
+    def append(self, move):
+        try:
+            code = _CODES[move]
+        except KeyError:
+            raise ValueError(f"Invalid move: {move}") from None
+
+        n = self._length
+        if self.depth is None:
+            if n == len(self._buf):
+                # grow into a fresh buffer so arrays exported by to_numpy stay valid
+                buf = bytearray(2 * n)
+                buf[:n] = self._buf
+                self._buf = buf
+            self._buf[n] = code
+        elif self.depth:
+            self._buf[n % self.depth] = code
+        self._length = n + 1
+
+    def clear(self):
+        self._buf = bytearray(16 if self.depth is None else self.depth)
+        self._length = 0
+
+    def kept(self):
+        """Number of moves that are still stored"""
+        if self.depth is None:
+            return self._length
+        return min(self._length, self.depth)
+
+    def _segments(self, k):
+        # (start, end) slices of the buffer holding the last k kept moves, oldest first
+        k = min(k, self.kept())
+        if k <= 0:
+            return []
+        n = self._length
+        if self.depth is None:
+            return [(n - k, n)]
+        start = (n - k) % self.depth
+        if start + k <= self.depth:
+            return [(start, start + k)]
+        return [(start, self.depth), (0, start + k - self.depth)]
+
+    def _raw(self, k):
+        return b''.join(self._buf[a:b] for a, b in self._segments(k))
+
+    def count(self, move, last=None):
+        """How many times `move` was played, optionally only in the last `last` moves"""
+        code = _CODES.get(move)
+        if code is None:
+            return 0
+        k = self.kept() if last is None else last
+        return sum(self._buf.count(code, a, b) for a, b in self._segments(k))
+
+    def window(self, k=None):
+        """The last k kept moves (all of them by default) as a 'CD...' string"""
+        return self._raw(self.kept() if k is None else k).translate(_DECODE).decode('ascii')
+
+    def to_numpy(self):
+        """
+        The kept moves as a uint8 array of 0 (C) / 1 (D).
+
+        Without a depth this is a zero-copy view of the underlying buffer;
+        ring buffers are copied into order.
+        """
+        import numpy as np
+
+        if self.depth is None:
+            return np.frombuffer(self._buf, dtype=np.uint8, count=self._length)
+        return np.frombuffer(self._raw(self.kept()), dtype=np.uint8)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # indices count every move appended; skip the ones no longer kept
+            oldest = self._length - self.kept()
+            return [self[i] for i in range(*index.indices(self._length)) if i >= oldest]
+
+        n = self._length
+        if index < 0:
+            index += n
+        if not n - self.kept() <= index < n:
+            raise IndexError("history index out of range")
+        if self.depth is None:
+            return _MOVES[self._buf[index]]
+        return _MOVES[self._buf[index % self.depth]]
+
+    def __iter__(self):
+        return iter(self.window())
+
+    def __reversed__(self):
+        return reversed(self.window())
+
+    def __contains__(self, move):
+        return self.count(move) > 0
+
+    def __eq__(self, other):
+        if isinstance(other, (MoveHistory, list, tuple, str)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __str__(self):
+        return self.window()
+
+    def __repr__(self):
+        if self.depth is None:
+            return f"MoveHistory({self.window()!r})"
+        return f"MoveHistory({self.window()!r}, depth={self.depth})"
@@ -1,15 +1,18 @@
 from strategies.base_strategy import Strategy
-import random
 
 class JossStrategy(Strategy):
     """Starts with cooperation, then mimics opponent's last move,
     but with a small probability of defecting randomly."""
+    memory_depth = 1  # only looks at the last move
+    memory_one = (0.9, 0, 0.9, 0)  # copies a cooperation 90% of the time
+    memory_one_start = 1
+
     def move(self):
         if not self.opponent_history:
             return 'C' # begin with cooperation
         
         else:
-            if random.random() < 0.1:
+            if self.rng.random() < 0.1:
                 return 'D' # 10 percent chance to defect
 
             return self.opponent_history[-1]
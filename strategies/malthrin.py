@@ -3,16 +3,21 @@ from strategies.base_strategy import Strategy
 class Malthrin(Strategy):
     """Starts with cooperation, then defects if the opponent has defected in the first 7 rounds,
     mimics opponent's last move until round 98, then defects in the endgame."""
+    deterministic = True
+    memory_depth = 1  # only looks at the last move
+
     def __init__(self):
-        self.my_history = []
-        self.opponent_history = []
+        super().__init__()
         self.round = 0  # keeps track of round
 
+    def state_fingerprint(self):
+        return self.round, bool(self.opponent_history), self.opponent_defections > 0
+
     def move(self):
         if not self.opponent_history:
             return 'C'  # start with defect
         if self.round < 7:
-            if 'D' in self.opponent_history:
+            if self.opponent_defections:
                 return 'D'  # if opponent has defected before in the first 7 rounds, always defect
             else:
                 return 'C'  # otherwise, cooperate
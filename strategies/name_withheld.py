@@ -1,19 +1,19 @@
 from strategies.base_strategy import Strategy
-import random
 
 class NameWithheld(Strategy):
     """Adapts cooperation probability based on opponent's defection rate,
     and defects against detected random opponents."""
+    memory_depth = 0  # only uses the running counters
+
     def __init__(self):
-        self.my_history = []
-        self.opponent_history = []   
+        super().__init__()
         self.probibility = 0.3 # start probility at 0.3
         self.round = 0
         self.random_detector = 0
  
     def move(self):       
-        if 'D' in self.opponent_history:
-            fraction = self.opponent_history.count('D') / len(self.opponent_history) # fraction of opponent defections
+        if self.opponent_defections:
+            fraction = self.opponent_defections / len(self.opponent_history) # fraction of opponent defections
         else:
             fraction = 0
         
@@ -29,7 +29,7 @@ class NameWithheld(Strategy):
 
         if self.random_detector == 1: # always defect if opponent is random
             return 'D'
-        elif random.random() <= self.probibility: # cooperate based on probability
+        elif self.rng.random() <= self.probibility: # cooperate based on probability
             return 'C'
 
         return 'D'
\ No newline at end of file
@@ -1,7 +1,10 @@
 from strategies.base_strategy import Strategy
-import random
 
 class RandomStrategy(Strategy):
     """Chooses 'C' or 'D' randomly with equal probability."""
+    memory_depth = 0  # never looks at past moves
+    memory_one = (0.5, 0.5, 0.5, 0.5)
+    memory_one_start = 0.5
+
     def move(self):
-        return random.choice(['C', 'D'])
\ No newline at end of file
+        return self.rng.choice(['C', 'D'])
\ No newline at end of file
@@ -0,0 +1,250 @@
+"""
+Lazy registry of the strategies in this package.
+
+Finding the strategies used to mean importing every module here and
+inspecting its classes. The registry gets the same list from the source
+alone: each module is parsed (not imported) and every top-level class that
+has a `move` method, its own or inherited, is recorded together with the
+properties the engines care about. The result is cached in
+__pycache__/strategy_manifest.json and only modules whose file changed are
+parsed again.
+
+A strategy's module is imported only when load_strategies() actually
+returns that strategy, so selecting a few strategies by name only imports
+those few modules.
+"""
+import ast
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+from pathlib import Path
+
+MANIFEST_NAME = "strategy_manifest.json"
+MANIFEST_VERSION = 1
+
+# what the base class declares, for classes that don't say otherwise
+DEFAULTS = {"deterministic": False, "memory_depth": None, "horizon_window": None}
+
+
+class StrategyEntry:
+    """One strategy class, described without importing it"""
+
+    def __init__(self, module, name, source_hash, deterministic=False, memory_depth=None,
+                 horizon_aware=False, horizon_window=None):
+        self.module = module
+        self.name = name
+        self.source_hash = source_hash
+        self.deterministic = deterministic
+        self.memory_depth = memory_depth
+        self.horizon_aware = horizon_aware
+        self.horizon_window = horizon_window
+
+    def load(self):
+        """Import the strategy's module and return the class"""
+        return getattr(importlib.import_module(self.module), self.name)
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    def __repr__(self):
+        return f"StrategyEntry({self.module}.{self.name})"
+
+
+def _literal(node):
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        return None
+
+
+def _parse_module(source, module_name, package_name):
+    """
+    Everything the registry needs from one module's source:
+    {class name: {"bases": [(module, class) or None], "move": bool,
+                  "total_rounds": bool, "attrs": {name: literal}}}
+    """
+    tree = ast.parse(source)
+
+    # names imported from elsewhere in the package, so base classes can be followed
+    imported = {}
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = module_name.rsplit(".", node.level)[0]
+                source_module = f"{base}.{node.module}" if node.module else base
+            else:
+                source_module = node.module or ""
+            if source_module.split(".")[0] != package_name:
+                continue
+            for alias in node.names:
+                imported[alias.asname or alias.name] = (source_module, alias.name)
+
+    classes = {}
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        bases = []
+        for base in node.bases:
+            if isinstance(base, ast.Name) and base.id in classes:
+                bases.append((module_name, base.id))
+            elif isinstance(base, ast.Name) and base.id in imported:
+                bases.append(imported[base.id])
+            else:
+                bases.append(None)
+
+        attrs = {}
+        has_move = False
+        for item in node.body:
+            if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name == "move":
+                has_move = True
+            elif isinstance(item, ast.Assign):
+                for target in item.targets:
+                    if isinstance(target, ast.Name) and target.id in DEFAULTS:
+                        attrs[target.id] = _literal(item.value)
+            elif isinstance(item, ast.AnnAssign) and isinstance(item.target, ast.Name):
+                if item.target.id in DEFAULTS and item.value is not None:
+                    attrs[item.target.id] = _literal(item.value)
+
+        # a strategy is horizon-aware when it keeps a total_rounds attribute
+        # for the engines to set (see tournament.play_game)
+        total_rounds = any(
+            isinstance(target, ast.Attribute) and target.attr == "total_rounds"
+            for sub in ast.walk(node) if isinstance(sub, (ast.Assign, ast.AnnAssign))
+            for target in (sub.targets if isinstance(sub, ast.Assign) else [sub.target])
+        )
+
+        classes[node.name] = {"bases": bases, "move": has_move, "total_rounds": total_rounds, "attrs": attrs}
+    return classes
+
+
+def _module_files(package_name):
+    # find_spec locates the package without running its __init__
+    spec = importlib.util.find_spec(package_name)
+    package_path = Path(next(iter(spec.submodule_search_locations)))
+    modules = []
+    for path in sorted(package_path.iterdir(), key=lambda p: p.name):
+        # same modules, in the same order, as pkgutil.iter_modules
+        if path.suffix == ".py" and path.stem != "__init__" and path.stem.isidentifier():
+            modules.append((path.stem, path))
+        elif path.is_dir() and (path / "__init__.py").exists() and path.name.isidentifier():
+            modules.append((path.name, path / "__init__.py"))
+    return package_path, modules
+
+
+def _load_cache(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != MANIFEST_VERSION:
+        return {}
+    return cache.get("modules", {})
+
+
+def _save_cache(path, modules):
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "modules": modules}, f, indent=1)
+        os.replace(tmp, path)
+    except OSError:
+        pass  # a read-only checkout just means parsing again next time
+
+
+def _scan(package_name):
+    """module name -> parsed module info, re-parsing only files that changed"""
+    package_path, files = _module_files(package_name)
+    cache_path = package_path / "__pycache__" / MANIFEST_NAME
+    cached = _load_cache(cache_path)
+
+    modules = {}
+    changed = False
+    for mod_name, path in files:
+        module_name = f"{package_name}.{mod_name}"
+        stat = path.stat()
+        entry = cached.get(module_name)
+        if entry is None or entry["mtime_ns"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+            source = path.read_bytes()
+            entry = {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "source_hash": hashlib.sha256(source).hexdigest(),
+                "classes": _parse_module(source, module_name, package_name),
+            }
+            changed = True
+        modules[module_name] = entry
+
+    if changed or set(modules) != set(cached):
+        _save_cache(cache_path, modules)
+    return modules
+
+
+def _resolve(modules, module_name, class_name, key, seen=()):
+    """Look `key` up through a class and its package-local bases, in MRO-ish order"""
+    if (module_name, class_name) in seen:
+        return None
+    info = modules.get(module_name, {}).get("classes", {}).get(class_name)
+    if info is None:
+        return None
+    if key == "move" or key == "total_rounds":
+        if info[key]:
+            return True
+    elif key in info["attrs"]:
+        return info["attrs"][key]
+    for base in info["bases"]:
+        if base is not None:
+            # json turns the (module, class) tuples into lists
+            value = _resolve(modules, base[0], base[1], key, seen + ((module_name, class_name),))
+            if value is not None:
+                return value
+    return None
+
+
+def manifest(package_name="strategies"):
+    """StrategyEntry for every strategy in the package, in load order"""
+    modules = _scan(package_name)
+    entries = []
+    for module_name, module in modules.items():
+        # inspect.getmembers lists classes alphabetically, so keep that order
+        for class_name in sorted(module["classes"]):
+            if class_name.lower() == "strategy":
+                continue  # the abstract base class
+            if not _resolve(modules, module_name, class_name, "move"):
+                continue  # helpers that aren't strategies (e.g. MoveHistory)
+
+            def prop(key):
+                value = _resolve(modules, module_name, class_name, key)
+                return DEFAULTS[key] if value is None else value
+
+            entries.append(StrategyEntry(
+                module_name, class_name, module["source_hash"],
+                deterministic=bool(prop("deterministic")),
+                memory_depth=prop("memory_depth"),
+                horizon_aware=bool(_resolve(modules, module_name, class_name, "total_rounds")),
+                horizon_window=prop("horizon_window"),
+            ))
+    return entries
+
+
+def load_strategies(package_name="strategies", names=None, where=None):
+    """
+    Strategy classes from the package, importing only the ones returned.
+
+    names: only these class names (in load order, not the order given)
+    where: only entries for which where(entry) is true, e.g.
+           `lambda e: e.deterministic`
+    """
+    entries = manifest(package_name)
+    if names is not None:
+        names = set(names)
+        unknown = names - {e.name for e in entries}
+        if unknown:
+            raise ValueError(f"Unknown strategies: {', '.join(sorted(unknown))}")
+        entries = [e for e in entries if e.name in names]
+    if where is not None:
+        entries = [e for e in entries if where(e)]
+    return [e.load() for e in entries]
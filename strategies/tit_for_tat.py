@@ -2,6 +2,17 @@ from strategies.base_strategy import Strategy
 
 class TitForTat(Strategy):
     """starts with cooperate, then mimics opponent's last move"""
+    deterministic = True
+    memory_depth = 1  # only looks at the last move
+    memory_one = (1, 0, 1, 0)
+    memory_one_start = 1
+    # (move, next state if opponent cooperates, next state if opponent defects)
+    state_table = [('C', 0, 1), ('D', 0, 1)]
+
+    def state_fingerprint(self):
+        # the next move is all there is to it
+        return self.opponent_history[-1] if self.opponent_history else 'C'
+
     def move(self):
         if not self.opponent_history:
             return 'C'  # start with cooperation
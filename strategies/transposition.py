@@ -0,0 +1,79 @@
+from collections import OrderedDict
+
+MOVES = ("C", "D")
+
+
+class TranspositionTable:
+    """
+    Bounded cache of search results, shared by every instance that uses it.
+    Once `maxsize` entries are stored the least recently used one is dropped.
+    """
+    def __init__(self, maxsize=65536):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# one table for the whole process, so every MiniMax / MaxMax instance shares it
+SEARCH_TABLE = TranspositionTable()
+
+
+def lookahead_value(game, my_move, maximize, rounds_left, reply=min):
+    """
+    Exact value of the look-ahead search used by MiniMax (reply=min) and
+    MaxMax (reply=max).
+
+    The search never looks at the game history, so its value only depends on
+    (my_move, maximize, rounds_left) and the game's payoffs. Each look-ahead
+    level only depends on the one below it, so a miss fills the table level
+    by level in O(rounds_left) instead of walking a 4**rounds_left tree.
+    """
+    points = game.points
+    payoff_key = game.key
+    key = (reply.__name__, payoff_key, my_move, maximize, rounds_left)
+    value = SEARCH_TABLE.get(key)
+    if value is not None:
+        return value
+
+    # no rounds left to simulate is worth nothing
+    previous = {(m, turn): 0 for m in MOVES for turn in (True, False)}
+    for level in range(1, rounds_left + 1):
+        current = {}
+        for m in MOVES:
+            # its turn: try to maximize its own score
+            current[(m, True)] = max(
+                points[(m, opp_move)][0] + previous[(opp_move, False)] for opp_move in MOVES
+            )
+            # opponent turn: scored for it, picked by `reply`
+            current[(m, False)] = reply(
+                points[(my_next_move, m)][0] + previous[(my_next_move, True)] for my_next_move in MOVES
+            )
+        for (m, turn), level_value in current.items():
+            SEARCH_TABLE.put((reply.__name__, payoff_key, m, turn, level), level_value)
+        previous = current
+
+    return previous[(my_move, maximize)]
@@ -0,0 +1,60 @@
+"""
+TitForTat as an external bot, speaking remote.py's line-delimited JSON
+protocol on stdin / stdout. Plays any number of matches at once.
+
+Requests are read in whatever chunks arrive and all the answers to one
+chunk go out in a single write, so a pipelined scheduler isn't held up by
+one write per move.
+
+    python remote.py "TitForTatBot=python stub_bot.py"
+"""
+import json
+import os
+import sys
+
+
+def answer(message, opponent_last):
+    """The response line for one request (None if it needs no answer)"""
+    kind = message["type"]
+    if kind == "start":
+        opponent_last[message["match"]] = None
+    elif kind == "move":
+        match = message["match"]
+        if message["last"] is not None:
+            opponent_last[match] = message["last"][1]
+        move = opponent_last.get(match) or "C"  # cooperate first, then copy
+        return json.dumps({"match": match, "round": message["round"], "move": move}) + "\n"
+    elif kind == "end":
+        opponent_last.pop(message["match"], None)
+    return None
+
+
+def main():
+    opponent_last = {}  # match -> opponent's last move, None before the first round
+    stdin, stdout = sys.stdin.fileno(), sys.stdout.buffer
+    pending = b""
+    while True:
+        chunk = os.read(stdin, 1 << 16)
+        if not chunk:
+            break
+        *lines, pending = (pending + chunk).split(b"\n")
+
+        out = []
+        for line in lines:
+            if not line.strip():
+                continue
+            message = json.loads(line)
+            if message["type"] == "quit":
+                stdout.write("".join(out).encode("utf-8"))
+                stdout.flush()
+                return
+            response = answer(message, opponent_last)
+            if response is not None:
+                out.append(response)
+        if out:
+            stdout.write("".join(out).encode("utf-8"))
+            stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+Round-count sweeps spread over any number of processes and hosts, with a
+shared directory as the work queue.
+
+A sweep is a grid of round counts x pairings x seeds x games. It is cut
+into work units of one game, one seed and a chunk of pairings; a unit
+plays its pairings once out to the longest round count (like run_sweep),
+so every round count comes out of the same game.
+
+    sweep/
+        spec.json               what the sweep is: written once, read by every node
+        claims/{unit}.{n}.lock  who is working on a unit (n-th attempt)
+        done/{unit}.json        a finished unit's scores
+
+Nothing coordinates the nodes but the file system:
+
+  * a unit is claimed by creating its lock file with O_CREAT | O_EXCL,
+    which only one node can do. While it plays the unit, the node keeps
+    touching the lock.
+  * a lock that hasn't been touched for `stale_after` seconds belongs to a
+    node that died. Anyone may take the unit over by creating the next
+    attempt's lock, again with O_EXCL, so two nodes can't both take over
+    the same dead claim.
+  * a finished unit is written to done/ with write-then-rename. That file
+    is the checkpoint: it is never played again, so an interrupted sweep
+    picks up where it stopped by running `work` again. Results are seeded,
+    so even a unit that does get played twice (a slow node mistaken for
+    a dead one) writes the same scores.
+
+The directory only needs O_EXCL creates and atomic renames, which local
+disks and NFSv3+ both give.
+
+Usage:
+    python sweep_queue.py init [dir]     # the tournament.py sweep, seed 0
+    python sweep_queue.py work [dir]     # on every node, as often as you like
+    python sweep_queue.py status [dir]
+    python sweep_queue.py merge [dir]    # the usual tournament_results_{N}rounds.csv
+"""
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+from match_cache import strategy_hash
+from strategies.game import DEFAULT_GAME, Game
+from tournament import SWEEP_ROUNDS, load_strategies, pairings, print_rankings, record_match, results_folder
+from tournament import save_results, sweep_pairings
+
+QUEUE_DIR = Path("tournament_results") / "sweep_queue"
+
+
+def _write_json(path, data):
+    # write then rename, so readers never see half a file
+    tmp = path.with_name(f".{path.name}.{socket.gethostname()}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class Heartbeat:
+    """Touches `path` every `interval` seconds until stopped"""
+
+    def __init__(self, path, interval):
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                os.utime(self.path)
+            except OSError:
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class SweepQueue:
+    def __init__(self, directory=QUEUE_DIR):
+        self.directory = Path(directory)
+        self.spec_path = self.directory / "spec.json"
+        self.claims = self.directory / "claims"
+        self.done = self.directory / "done"
+        self._spec = None
+        self._strategies = None
+
+    # --- the sweep itself -------------------------------------------------
+
+    def create(self, round_counts=SWEEP_ROUNDS, seeds=(0,), games=(DEFAULT_GAME,), strategies=None,
+               chunk=8):
+        """
+        Write the sweep's spec, unless the directory already holds it.
+
+        Every node can call this with the same arguments: the first one
+        writes spec.json, the others check that it matches. A different
+        sweep in the same directory is a ValueError.
+        """
+        if strategies is None:
+            strategies = load_strategies()
+        spec = {
+            "version": 1,
+            "round_counts": sorted(set(round_counts)),
+            "seeds": list(seeds),
+            "games": [{"name": g.slug, "payoffs": g.values} for g in games],
+            "strategies": [{"name": S.__name__, "source_hash": strategy_hash(S)} for S in strategies],
+            "chunk": chunk,
+        }
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.claims.mkdir(exist_ok=True)
+        self.done.mkdir(exist_ok=True)
+        try:
+            fd = os.open(self.spec_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if self.spec != spec:
+                raise ValueError(f"{self.directory} already holds a different sweep") from None
+            return self
+        # nobody reads the spec before it is complete: they wait for it in `spec`
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(spec, f)
+        self._spec = spec
+        return self
+
+    @property
+    def spec(self):
+        if self._spec is None:
+            # another node may be halfway through writing it
+            for _ in range(50):
+                try:
+                    self._spec = _read_json(self.spec_path)
+                    break
+                except ValueError:
+                    time.sleep(0.1)
+            else:
+                raise ValueError(f"{self.spec_path} is not a valid sweep spec")
+        return self._spec
+
+    @property
+    def games(self):
+        return [Game(g["payoffs"], name=g["name"]) for g in self.spec["games"]]
+
+    @property
+    def strategies(self):
+        """
+        The sweep's strategy classes, in spec order. A strategy whose
+        source changed since the sweep was created would mix two versions
+        into one set of results, so that is a RuntimeError.
+        """
+        if self._strategies is None:
+            wanted = self.spec["strategies"]
+            by_name = {S.__name__: S for S in load_strategies(names=[s["name"] for s in wanted])}
+            for s in wanted:
+                if strategy_hash(by_name[s["name"]]) != s["source_hash"]:
+                    raise RuntimeError(f"{s['name']} changed since the sweep in {self.directory} was created")
+            self._strategies = [by_name[s["name"]] for s in wanted]
+        return self._strategies
+
+    def units(self):
+        """
+        Every work unit, as (unit id, game, seed, first pairing, end pairing);
+        worked out from the spec alone, so every node gets the same list.
+        """
+        spec = self.spec
+        count = len(spec["strategies"]) * (len(spec["strategies"]) - 1) // 2
+        units = []
+        for game in self.games:
+            for seed in spec["seeds"]:
+                for start in range(0, count, spec["chunk"]):
+                    unit = f"{game.slug}-seed{seed}-{start // spec['chunk']:05d}"
+                    units.append((unit, game, seed, start, min(start + spec["chunk"], count)))
+        return units
+
+    # --- claiming -----------------------------------------------------------
+
+    def _done_path(self, unit):
+        return self.done / f"{unit}.json"
+
+    def _lock_path(self, unit, attempt):
+        return self.claims / f"{unit}.{attempt}.lock"
+
+    def _latest_attempt(self, unit):
+        attempt = -1
+        while self._lock_path(unit, attempt + 1).exists():
+            attempt += 1
+        return attempt
+
+    def claim(self, unit, stale_after):
+        """
+        The lock path if this process now owns `unit`, else None (it is
+        finished, or someone alive is working on it).
+        """
+        if self._done_path(unit).exists():
+            return None
+
+        latest = self._latest_attempt(unit)
+        if latest >= 0:
+            try:
+                idle = time.time() - self._lock_path(unit, latest).stat().st_mtime
+            except FileNotFoundError:
+                idle = 0.0  # cleaned up just now: the unit is finished
+            if idle < stale_after:
+                return None
+
+        path = self._lock_path(unit, latest + 1)
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return None  # somebody else got there first
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"host": socket.gethostname(), "pid": os.getpid(), "claimed": time.time()}, f)
+
+        # it may have finished between the first check and the claim
+        if self._done_path(unit).exists():
+            path.unlink(missing_ok=True)
+            return None
+        return path
+
+    def _release(self, unit):
+        for attempt in range(self._latest_attempt(unit) + 1):
+            self._lock_path(unit, attempt).unlink(missing_ok=True)
+
+    # --- playing ------------------------------------------------------------
+
+    def run_unit(self, unit, game, seed, start, end, workers=None, cache=None):
+        """Play one unit and write its done file"""
+        matchups = pairings(self.strategies)[start:end]
+        horizons = self.spec["round_counts"]
+        began = time.perf_counter()
+        if cache is not None:
+            sweeps = cache.sweep_pairings(matchups, horizons, workers=workers, seed=seed, game=game)
+        else:
+            sweeps = sweep_pairings(matchups, horizons, workers=workers, seed=seed, game=game)
+
+        _write_json(self._done_path(unit), {
+            "unit": unit,
+            "pairings": [[S1.__name__, S2.__name__] for S1, S2 in matchups],
+            "scores": [[list(score) for score in sweep] for sweep in sweeps],
+            "host": socket.gethostname(),
+            "seconds": time.perf_counter() - began,
+        })
+
+    def work(self, workers=None, cache=None, stale_after=600, max_units=None):
+        """
+        Claim and play units until none are left to claim. Safe to run on
+        any number of nodes at once and to kill at any point.
+
+        stale_after: seconds without a heartbeat before a claim counts as
+                     dead. Heartbeats go out every stale_after / 4 seconds.
+        max_units:   stop after this many units (None: keep going)
+
+        Returns the number of units this call played.
+        """
+        self.strategies  # fail early if the code doesn't match the sweep
+        played = 0
+        while max_units is None or played < max_units:
+            progress = False
+            for unit, game, seed, start, end in self.units():
+                if max_units is not None and played >= max_units:
+                    break
+                lock = self.claim(unit, stale_after)
+                if lock is None:
+                    continue
+                with Heartbeat(lock, stale_after / 4):
+                    self.run_unit(unit, game, seed, start, end, workers=workers, cache=cache)
+                self._release(unit)
+                print(f"finished {unit}")
+                played += 1
+                progress = True
+            if not progress:
+                break  # everything left is finished or claimed by live nodes
+        return played
+
+    # --- results ------------------------------------------------------------
+
+    def status(self):
+        units = self.units()
+        finished = sum(1 for unit, *_ in units if self._done_path(unit).exists())
+        claimed = sum(1 for unit, *_ in units
+                      if not self._done_path(unit).exists() and self._latest_attempt(unit) >= 0)
+        return {"units": len(units), "finished": finished, "claimed": claimed,
+                "waiting": len(units) - finished - claimed}
+
+    def merge(self, save=True, store=None, folder=Path("tournament_results")):
+        """
+        Turn the finished units into the usual per-round-count results:
+        tournament_results_{N}rounds.csv for every round count, under
+        results_folder(game), plus a seed_{seed}/ folder per seed when the
+        sweep has more than one. Raises RuntimeError while units are missing.
+
+        Returns {(game name, seed, rounds): results}.
+        """
+        strategies = self.strategies
+        matchups = pairings(strategies)
+        round_counts = self.spec["round_counts"]
+        seeds = self.spec["seeds"]
+
+        sweeps = {}  # (game name, seed) -> per-pairing sweeps, in pairings order
+        missing = []
+        for unit, game, seed, start, end in self.units():
+            try:
+                entry = _read_json(self._done_path(unit))
+            except FileNotFoundError:
+                missing.append(unit)
+                continue
+            sweeps.setdefault((game.slug, seed), [None] * len(matchups))[start:end] = entry["scores"]
+        if missing:
+            raise RuntimeError(f"{len(missing)} units not finished yet, e.g. {missing[0]}")
+
+        merged = {}
+        for game in self.games:
+            for seed in seeds:
+                out = results_folder(game, folder)
+                if len(seeds) > 1:
+                    out = out / f"seed_{seed}"
+                for k, rounds in enumerate(round_counts):
+                    print(f"--- {game.slug}, seed {seed}, {rounds} rounds ---")
+                    results = {s.__name__: 0 for s in strategies}
+                    match_data = []
+                    for (S1, S2), sweep in zip(matchups, sweeps[(game.slug, seed)]):
+                        score1, score2 = sweep[k]
+                        record_match(results, match_data, S1, S2, score1, score2)
+
+                    if save:
+                        save_results(rounds, match_data, results, out)
+                    if store is not None:
+                        store.append_run(rounds, match_data, results, strategies=strategies, seed=seed, game=game)
+                    print_rankings(results)
+                    merged[(game.slug, seed, rounds)] = results
+        return merged
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    queue = SweepQueue(sys.argv[2] if len(sys.argv) > 2 else QUEUE_DIR)
+
+    if command == "init":
+        queue.create()
+        print(f"{len(queue.units())} units in {queue.directory}")
+    elif command == "work":
+        print(f"played {queue.work(workers=os.cpu_count())} units")
+    elif command == "status":
+        for name, value in queue.status().items():
+            print(f"{name:10s} {value}")
+    elif command == "merge":
+        queue.merge()
+    else:
+        raise SystemExit(f"unknown command: {command} (expected init, work, status or merge)")
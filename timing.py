@@ -0,0 +1,127 @@
+"""
+Where tournament time goes: per-strategy wall time and call counts for
+move() and record_result(), and per-pairing time and rounds.
+
+Timing is opt-in (run_tournament(..., timing=True)). Games only switch to
+the timed round function when they are handed a Timings, so an untimed
+tournament runs exactly the code it always did.
+
+profile_pairing runs one pairing under cProfile and dumps the stats.
+"""
+import cProfile
+import csv
+import io
+import pstats
+from pathlib import Path
+
+from strategies.game import DEFAULT_GAME
+
+TIMING_DIR = Path("tournament_results") / "timing"
+
+
+class Timings:
+    def __init__(self):
+        # name -> [move seconds, move calls, record_result seconds, record_result calls]
+        self.strategies = {}
+        # (name1, name2) -> [seconds, rounds]
+        self.pairings = {}
+
+    def strategy(self, name):
+        return self.strategies.setdefault(name, [0.0, 0, 0.0, 0])
+
+    def pairing(self, name1, name2):
+        return self.pairings.setdefault((name1, name2), [0.0, 0])
+
+    def merge(self, other):
+        for name, (move_s, moves, record_s, records) in other.strategies.items():
+            totals = self.strategy(name)
+            totals[0] += move_s
+            totals[1] += moves
+            totals[2] += record_s
+            totals[3] += records
+        for pair, (seconds, rounds) in other.pairings.items():
+            totals = self.pairing(*pair)
+            totals[0] += seconds
+            totals[1] += rounds
+
+    def strategy_rows(self):
+        """One dict per strategy, most time spent first"""
+        rows = []
+        for name, (move_s, moves, record_s, records) in self.strategies.items():
+            rows.append({
+                "Strategy": name,
+                "Move Seconds": move_s,
+                "Move Calls": moves,
+                "Record Seconds": record_s,
+                "Record Calls": records,
+                "Total Seconds": move_s + record_s,
+                "Microseconds Per Move": 1e6 * move_s / moves if moves else 0.0,
+            })
+        return sorted(rows, key=lambda r: r["Total Seconds"], reverse=True)
+
+    def pairing_rows(self):
+        rows = []
+        for (name1, name2), (seconds, rounds) in self.pairings.items():
+            rows.append({
+                "Player 1": name1,
+                "Player 2": name2,
+                "Seconds": seconds,
+                "Rounds": rounds,
+                "Rounds Per Second": rounds / seconds if seconds else 0.0,
+            })
+        return sorted(rows, key=lambda r: r["Seconds"], reverse=True)
+
+    def print_table(self, top_pairings=10):
+        print("time spent:")
+        print(f"{'':25s} {'move s':>10s} {'record s':>10s} {'total s':>10s} {'us/move':>10s}")
+        for row in self.strategy_rows():
+            print(f"{row['Strategy']:25s} {row['Move Seconds']:10.4f} {row['Record Seconds']:10.4f} "
+                  f"{row['Total Seconds']:10.4f} {row['Microseconds Per Move']:10.2f}")
+
+        print(f"slowest pairings:")
+        for row in self.pairing_rows()[:top_pairings]:
+            pair = f"{row['Player 1']} vs {row['Player 2']}"
+            print(f"{pair:45s} {row['Seconds']:10.4f}s {row['Rounds Per Second']:12,.0f} rounds/s")
+
+    def save(self, name, folder=TIMING_DIR):
+        """Write both tables to folder/timing_{name}.csv, strategies first"""
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"timing_{name}.csv"
+
+        strategy_rows, pairing_rows = self.strategy_rows(), self.pairing_rows()
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(strategy_rows[0]) if strategy_rows else ["Strategy"])
+            writer.writeheader()
+            writer.writerows(strategy_rows)
+
+            f.write("\n")  # blank line before the pairings
+            writer = csv.DictWriter(f, fieldnames=list(pairing_rows[0]) if pairing_rows else ["Player 1"])
+            writer.writeheader()
+            writer.writerows(pairing_rows)
+        return path
+
+
+def profile_pairing(S1, S2, rounds, match_seed=None, folder=TIMING_DIR, top=25, game=DEFAULT_GAME):
+    """
+    Play one S1 vs S2 game under cProfile, dump the stats to
+    folder/profile_{S1}_vs_{S2}_{rounds}rounds.prof (for snakeviz, pstats
+    etc.) and print the `top` entries by cumulative time.
+    """
+    from tournament import new_match, play_game
+
+    p1, p2 = new_match(S1, S2, match_seed)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    play_game(p1, p2, rounds, game=game)
+    profiler.disable()
+
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / f"profile_{S1.__name__}_vs_{S2.__name__}_{rounds}rounds.prof"
+    profiler.dump_stats(path)
+
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+    print(out.getvalue())
+    return path
@@ -1,78 +1,428 @@
-import importlib
-import inspect
-import pkgutil
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import copy
 import csv
 
-POINTS = {
-    ('C', 'C'): (3, 3),  # both cooperate
-    ('C', 'D'): (0, 5),  # first cooperate, second betray
-    ('D', 'C'): (5, 0),  # first betray, second cooperate
-    ('D', 'D'): (1, 1)   # both betray
-}
+from seeding import match_seeds, seed_players
+from strategies.game import DEFAULT_GAME
+from strategies.registry import load_strategies
+
+# the round counts of the standard sweep (run_sweep below, sweep_queue.py)
+SWEEP_ROUNDS = [
+    50, 55, 150, 155, 200, 205, 250, 255, 305, 355, 405,
+    455, 505, 555, 605, 655, 705, 755, 805, 855, 905, 955,
+    1005, 1055, 1105, 1155, 1205, 1255, 1305, 1355, 1405,
+]
+
+
+def invalid_move(p1, move1, p2, move2):
+    return ValueError(f"Invalid move: {p1.__class__.__name__} -> {move1}, {p2.__class__.__name__} -> {move2}")
+
+
+def round_function(game):
+    """
+    play_round for `game`. The payoff lookup is bound once per game, and
+    checking the moves is folded into it: anything but 'C' / 'D' misses
+    the table.
+    """
+    lookup = game.lookup
+
+    def play_round(p1, p2):
+        # both players pick a move
+        move1 = p1.move()
+        move2 = p2.move()
+
+        # look up their scores from the table
+        try:
+            r1, r2 = lookup[move1][move2]
+        except (KeyError, TypeError):
+            raise invalid_move(p1, move1, p2, move2) from None
+
+        # tell each player what happened
+        p1.record_result(move1, move2)
+        p2.record_result(move2, move1)
+
+        return r1, r2
+
+    return play_round
+
+
+play_round = round_function(DEFAULT_GAME)
+
+
+def timed_round(timings, p1, p2, game=DEFAULT_GAME):
+    """
+    A play_round for one p1 vs p2 game that also adds the time spent in
+    each player's move() and record_result() to `timings` (a timing.Timings)
+    and counts the rounds against the pairing.
+    """
+    clock = time.perf_counter
+    lookup = game.lookup
+    stats1 = timings.strategy(p1.__class__.__name__)
+    stats2 = timings.strategy(p2.__class__.__name__)
+    pair = timings.pairing(p1.__class__.__name__, p2.__class__.__name__)
+
+    def play(p1, p2):
+        t0 = clock()
+        move1 = p1.move()
+        t1 = clock()
+        move2 = p2.move()
+        t2 = clock()
+
+        try:
+            r1, r2 = lookup[move1][move2]
+        except (KeyError, TypeError):
+            raise invalid_move(p1, move1, p2, move2) from None
+
+        t3 = clock()
+        p1.record_result(move1, move2)
+        t4 = clock()
+        p2.record_result(move2, move1)
+        t5 = clock()
+
+        stats1[0] += t1 - t0
+        stats1[1] += 1
+        stats2[0] += t2 - t1
+        stats2[1] += 1
+        stats1[2] += t4 - t3
+        stats1[3] += 1
+        stats2[2] += t5 - t4
+        stats2[3] += 1
+        pair[1] += 1
+        return r1, r2
+
+    return play
+
+
+def skip_cycles(p1, p2, rounds, play=play_round):
+    """
+    Play until the joint (p1, p2) state fingerprint repeats, then skip over
+    as many whole repeats of that cycle as fit in `rounds`.
+
+    Stops without skipping anything as soon as either player has no
+    fingerprint. Skipped rounds are scored but not recorded in the players'
+    histories.
+
+    Returns (rounds played or skipped, total1, total2); fewer than one
+    cycle's worth of rounds is left for the caller to play.
+    """
+    seen = {}  # joint fingerprint -> (round, total1, total2) when first seen
+    total1 = total2 = 0
+    played = 0
+    while played < rounds:
+        state = (p1.state_fingerprint(), p2.state_fingerprint())
+        if state[0] is None or state[1] is None:
+            break
+
+        if state in seen:
+            start, before1, before2 = seen[state]
+            period = played - start
+            cycles = (rounds - played) // period
+            total1 += cycles * (total1 - before1)
+            total2 += cycles * (total2 - before2)
+            played += cycles * period
+            break
+
+        seen[state] = (played, total1, total2)
+        r1, r2 = play(p1, p2)
+        total1 += r1
+        total2 += r2
+        played += 1
 
+    return played, total1, total2
 
-def load_strategies(package_name="strategies"):
-    strategies = []
-    package = importlib.import_module(package_name)
 
+def set_game(p1, p2, game):
+    # each player sees the game from its own side
+    p1.game = game
+    p2.game = game.swapped()
 
-    package_path = Path(package.__file__).parent
 
+def play_game(p1, p2, rounds=100, detect_cycles=True, timings=None, game=DEFAULT_GAME):
+    set_game(p1, p2, game)
 
-    for _, mod_name, _ in pkgutil.iter_modules([str(package_path)]):
-        module = importlib.import_module(f"{package_name}.{mod_name}")
+    # only timed games pay for timing
+    if timings is not None:
+        start = time.perf_counter()
+        scores = _play_game(p1, p2, rounds, detect_cycles, timed_round(timings, p1, p2, game))
+        timings.pairing(p1.__class__.__name__, p2.__class__.__name__)[0] += time.perf_counter() - start
+        return scores
+    play = play_round if game is DEFAULT_GAME else round_function(game)
+    return _play_game(p1, p2, rounds, detect_cycles, play)
 
 
-        for name, obj in inspect.getmembers(module, inspect.isclass):
-            # only include classes defined in that file
-            if obj.__module__ == module.__name__:
-                # skip the abstract base class
-                if name.lower() == "strategy":
-                    continue
-                strategies.append(obj)
+def _play_game(p1, p2, rounds, detect_cycles, play):
+    # horizon-aware strategies need to know how long the game is
+    if hasattr(p1, "total_rounds"):
+        p1.total_rounds = rounds
+    if hasattr(p2, "total_rounds"):
+        p2.total_rounds = rounds
 
+    # keep track of total points for both players
+    total1 = total2 = 0
+    played = 0
+    if detect_cycles:
+        played, total1, total2 = skip_cycles(p1, p2, rounds, play)
 
-    return strategies
+    for _ in range(rounds - played):
+        r1, r2 = play(p1, p2)
+        total1 += r1
+        total2 += r2
+    return total1, total2
 
 
+def pairings(strategies):
+    # everyone plays everyone else once, skipping repeats and playing against self
+    return [
+        (S1, S2)
+        for i, S1 in enumerate(strategies)
+        for j, S2 in enumerate(strategies)
+        if i < j
+    ]
+
+
+def horizon_window(player):
+    """
+    How many rounds before the end of a game `player` can start behaving
+    differently depending on the game length.
+
+    Returns None for strategies that never look at `total_rounds`, and
+    math.inf for ones that do but don't declare a `horizon_window`.
+    """
+    if not hasattr(player, "total_rounds"):
+        return None
+    window = getattr(player, "horizon_window", None)
+    return math.inf if window is None else window
+
+
+def _finish_branch(p1, p2, rounds, played, total1, total2, play=play_round):
+    # copy both players together so the trunk game isn't disturbed
+    b1, b2 = copy.deepcopy((p1, p2))
+    if hasattr(b1, "total_rounds"):
+        b1.total_rounds = rounds
+    if hasattr(b2, "total_rounds"):
+        b2.total_rounds = rounds
+
+    for _ in range(rounds - played):
+        r1, r2 = play(b1, b2)
+        total1 += r1
+        total2 += r2
+    return total1, total2
 
 
-def play_round(p1, p2):
-    # both players pick a move
-    move1 = p1.move()
-    move2 = p2.move()
+def play_sweep(p1, p2, horizons, timings=None, game=DEFAULT_GAME):
+    """
+    Play one game out to the longest horizon and return the cumulative
+    (score1, score2) at every horizon, in ascending horizon order.
 
-    if move1 not in ("C", "D") or move2 not in ("C", "D"):
-        raise ValueError(f"Invalid move: {p1.__class__.__name__} -> {move1}, {p2.__class__.__name__} -> {move2}")
+    If neither player is horizon-aware the scores are just checkpointed
+    along the way. Otherwise the game is copied at the first round where
+    a shorter horizon could change anyone's behaviour and that branch is
+    finished separately with the shorter `total_rounds`.
 
-    # look up their scores from the table
-    r1, r2 = POINTS[(move1, move2)]
+    With `timings` (a timing.Timings) the time spent in every call is added up.
+    """
+    set_game(p1, p2, game)
+    if timings is not None:
+        start = time.perf_counter()
+        checkpoints = _play_sweep(p1, p2, horizons, timed_round(timings, p1, p2, game))
+        timings.pairing(p1.__class__.__name__, p2.__class__.__name__)[0] += time.perf_counter() - start
+        return checkpoints
+    play = play_round if game is DEFAULT_GAME else round_function(game)
+    return _play_sweep(p1, p2, horizons, play)
 
 
-    # tell each player what happened
-    p1.record_result(move1, move2)
-    p2.record_result(move2, move1)
+def _play_sweep(p1, p2, horizons, play):
+    horizons = sorted(set(horizons))
+    longest = horizons[-1]
+
+    windows = [w for w in (horizon_window(p1), horizon_window(p2)) if w is not None]
+    window = max(windows) if windows else None
 
     if hasattr(p1, "total_rounds"):
-        p1.total_rounds = rounds
+        p1.total_rounds = longest
     if hasattr(p2, "total_rounds"):
-        p2.total_rounds = rounds
-
-    return r1, r2
+        p2.total_rounds = longest
 
+    # round -> horizons to checkpoint (or branch off) before that round is played
+    stops = {}
+    for n in horizons[:-1]:
+        at = n if window is None else max(0, n - window)
+        stops.setdefault(at, []).append(n)
 
-def play_game(p1, p2, rounds=100):
-    # keep track of total points for both players
+    checkpoints = {}
     total1 = total2 = 0
-    for _ in range(rounds):
-        r1, r2 = play_round(p1, p2)
+    for played in range(longest):
+        for n in stops.get(played, ()):
+            if window is None:
+                checkpoints[n] = (total1, total2)
+            else:
+                checkpoints[n] = _finish_branch(p1, p2, n, played, total1, total2, play)
+
+        r1, r2 = play(p1, p2)
         total1 += r1
         total2 += r2
-    return total1, total2
+    checkpoints[longest] = (total1, total2)
+
+    return [checkpoints[n] for n in horizons]
+
+
+def new_match(S1, S2, match_seed=None):
+    # fresh players, each with its own random stream when the match is seeded
+    p1, p2 = S1(), S2()
+    seed_players(p1, p2, match_seed)
+    return p1, p2
+
+
+def _play_pairing(job):
+    # module-level so it can be pickled and sent to worker processes
+    S1, S2, rounds, match_seed, timed, game = job
+    if not timed:
+        return play_game(*new_match(S1, S2, match_seed), rounds, game=game)
+
+    from timing import Timings
+    timings = Timings()
+    return play_game(*new_match(S1, S2, match_seed), rounds, timings=timings, game=game), timings
+
+
+def _sweep_pairing(job):
+    S1, S2, horizons, match_seed, timed, game = job
+    if not timed:
+        return play_sweep(*new_match(S1, S2, match_seed), horizons, game=game)
+
+    from timing import Timings
+    timings = Timings()
+    return play_sweep(*new_match(S1, S2, match_seed), horizons, timings=timings, game=game), timings
+
+
+def _merge_timings(results, timings):
+    # timed jobs come back as (scores, Timings); fold those into `timings`
+    for _, job_timings in results:
+        timings.merge(job_timings)
+    return [scores for scores, _ in results]
+
+
+def map_jobs(fn, jobs, workers=None):
+    # run fn on every job, across a process pool when workers > 1;
+    # results always come back in job order, serial or not
+    if not workers or workers <= 1 or len(jobs) <= 1:
+        return [fn(job) for job in jobs]
+
+    # a few pairings per task keeps the pickling overhead down
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, jobs, chunksize=chunksize))
+
+
+def play_pairings(matchups, rounds, workers=None, seed=None, seeds=None, timings=None, game=DEFAULT_GAME):
+    """
+    Play every (S1, S2) pairing for `rounds` rounds.
 
+    With workers > 1 the pairings are spread across a process pool.
+    Scores come back in the same order as `matchups` either way, so the
+    caller can merge them exactly like a serial run. With a `seed`, every
+    match gets its own random stream (see seeding.py), so random pairings
+    are reproducible too. `seeds` gives the per-match seeds directly, for
+    callers that only play part of a seeded tournament. With `timings` (a
+    timing.Timings) every game is timed and the totals are added to it.
+    `game` (a strategies.game.Game) is what every pairing plays.
+    """
+    if seeds is None:
+        seeds = match_seeds(matchups, seed)
+    jobs = [(S1, S2, rounds, s, timings is not None, game) for (S1, S2), s in zip(matchups, seeds)]
+    results = map_jobs(_play_pairing, jobs, workers)
+    return results if timings is None else _merge_timings(results, timings)
 
-def run_tournament(rounds=100, save=True):
+
+def sweep_pairings(matchups, horizons, workers=None, seed=None, seeds=None, timings=None, game=DEFAULT_GAME):
+    """
+    play_sweep every (S1, S2) pairing; returns one list of per-horizon
+    scores per pairing, in the same order as `matchups`.
+    """
+    if seeds is None:
+        seeds = match_seeds(matchups, seed)
+    jobs = [(S1, S2, horizons, s, timings is not None, game) for (S1, S2), s in zip(matchups, seeds)]
+    results = map_jobs(_sweep_pairing, jobs, workers)
+    return results if timings is None else _merge_timings(results, timings)
+
+
+def record_match(results, match_data, S1, S2, score1, score2):
+    results[S1.__name__] += score1
+    results[S2.__name__] += score2
+
+    print(f"{S1.__name__} vs {S2.__name__}: {score1}-{score2}")
+
+    match_data.append({
+        "Player 1": S1.__name__,
+        "Player 2": S2.__name__,
+        "Score 1": score1,
+        "Score 2": score2
+    })
+
+
+def results_folder(game=DEFAULT_GAME, folder=Path("tournament_results")):
+    # other games get a folder of their own so they don't overwrite the
+    # prisoner's dilemma results
+    folder = Path(folder)
+    return folder if game == DEFAULT_GAME else folder / game.slug
+
+
+def save_results(rounds, match_data, results, folder=Path("tournament_results")):
+    # save results to csv with rounds in filename
+    results_folder = Path(folder)
+    results_folder.mkdir(parents=True, exist_ok=True)
+
+    filename = results_folder / f"tournament_results_{rounds}rounds.csv"
+
+    with open(filename, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["Player 1", "Player 2", "Score 1", "Score 2"])
+        writer.writeheader()
+        writer.writerows(match_data)
+
+        writer.writerow({})  # blank line before final scores
+        for name, total in sorted(results.items(), key=lambda x: x[1], reverse=True):
+            f.write(f"final score,{name},{total},\n")
+
+
+def print_rankings(results):
+    print("final rankings:")
+    for name, total in sorted(results.items(), key=lambda x: x[1], reverse=True):
+        print(f"{name:25s} {total}")
+
+
+def _start_timing(strategies, timing, profile, rounds, seed):
+    """
+    A timing.Timings if `timing` is on (None otherwise). `profile` is a
+    (name1, name2) pairing to play once more under cProfile first.
+    """
+    if profile is not None:
+        from timing import profile_pairing
+
+        by_name = {s.__name__: s for s in strategies}
+        S1, S2 = by_name[profile[0]], by_name[profile[1]]
+        profile_pairing(S1, S2, rounds, match_seeds([(S1, S2)], seed)[0])
+
+    if not timing:
+        return None
+    from timing import Timings
+    return Timings()
+
+
+def run_tournament(rounds=100, save=True, workers=None, cache=None, seed=None, store=None,
+                   timing=False, profile=None, game=DEFAULT_GAME):
+    """
+    timing=True also prints (and saves, with `save`) how long every
+    strategy spent in move() / record_result() and every pairing took;
+    profile=(name1, name2) dumps a cProfile of that pairing. Both go to
+    tournament_results/timing/.
+
+    `game` is the strategies.game.Game to play, the prisoner's dilemma by
+    default; results for other games are saved under
+    tournament_results/{game.slug}/.
+    """
     # grab all the strategies we found
     strategies = load_strategies()
     results = {s.__name__: 0 for s in strategies}
@@ -82,60 +432,79 @@ def run_tournament(rounds=100, save=True):
     for s in strategies:
         print("  -", s.__name__)
 
+    timings = _start_timing(strategies, timing, profile, rounds, seed)
+
     # everyone plays everyone else once
-    for i, S1 in enumerate(strategies):
-        for j, S2 in enumerate(strategies):
-            if i >= j:
-                continue  # skip repeats and playing against self
-            p1 = S1()
-            p2 = S2()
-            score1, score2 = play_game(p1, p2, rounds)
-
-            results[S1.__name__] += score1
-            results[S2.__name__] += score2
-
-            print(f"{S1.__name__} vs {S2.__name__}: {score1}-{score2}")
-
-            match_data.append({
-                "Player 1": S1.__name__,
-                "Player 2": S2.__name__,
-                "Score 1": score1,
-                "Score 2": score2
-            })
+    matchups = pairings(strategies)
+    if cache is not None:
+        # only play what the match cache doesn't already know
+        scores = cache.play_pairings(matchups, rounds, workers=workers, seed=seed, timings=timings, game=game)
+    else:
+        scores = play_pairings(matchups, rounds, workers=workers, seed=seed, timings=timings, game=game)
+
+    for (S1, S2), (score1, score2) in zip(matchups, scores):
+        record_match(results, match_data, S1, S2, score1, score2)
 
-    # save results to csv with rounds in filename
     if save:
-        results_folder = Path("tournament_results")
-        results_folder.mkdir(exist_ok=True)
+        save_results(rounds, match_data, results, results_folder(game))
+    if store is not None:
+        store.append_run(rounds, match_data, results, strategies=strategies, seed=seed, game=game)
+
+    # print summary
+    print_rankings(results)
+    if timings is not None:
+        timings.print_table()
+        if save:
+            timings.save(f"{rounds}rounds")
+
+
+def run_sweep(round_counts, save=True, workers=None, cache=None, seed=None, store=None,
+              timing=False, profile=None, game=DEFAULT_GAME):
+    """
+    Like calling run_tournament once per round count, but every pairing is
+    only played once, out to the longest round count. `timing` covers the
+    whole sweep; `profile` plays its pairing at the longest round count.
+    """
+    horizons = sorted(set(round_counts))
+    strategies = load_strategies()
+
+    print(f"loaded {len(strategies)} strategies:")
+    for s in strategies:
+        print("  -", s.__name__)
 
-        filename = results_folder / f"tournament_results_{rounds}rounds.csv"
+    timings = _start_timing(strategies, timing, profile, horizons[-1], seed)
 
-        with open(filename, "w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=["Player 1", "Player 2", "Score 1", "Score 2"])
-            writer.writeheader()
-            writer.writerows(match_data)
+    matchups = pairings(strategies)
+    if cache is not None:
+        sweeps = cache.sweep_pairings(matchups, horizons, workers=workers, seed=seed, timings=timings, game=game)
+    else:
+        sweeps = sweep_pairings(matchups, horizons, workers=workers, seed=seed, timings=timings, game=game)
 
-            writer.writerow({})  # blank line before final scores
-            for name, total in sorted(results.items(), key=lambda x: x[1], reverse=True):
-                f.write(f"final score,{name},{total},\n")
+    for k, rounds in enumerate(horizons):
+        print(f"--- {rounds} rounds ---")
+        results = {s.__name__: 0 for s in strategies}
+        match_data = []
 
-    # print summary
-    print("final rankings:")
-    for name, total in sorted(results.items(), key=lambda x: x[1], reverse=True):
-        print(f"{name:25s} {total}")
+        for (S1, S2), scores in zip(matchups, sweeps):
+            score1, score2 = scores[k]
+            record_match(results, match_data, S1, S2, score1, score2)
 
+        if save:
+            save_results(rounds, match_data, results, results_folder(game))
+        if store is not None:
+            store.append_run(rounds, match_data, results, strategies=strategies, seed=seed, game=game)
 
+        print_rankings(results)
 
-if __name__ == "__main__":
-    # round counts to run
-    round_counts = [
-        50, 55, 150, 155, 200, 205, 250, 255, 305, 355, 405, 
-        455, 505, 555, 605, 655, 705, 755, 805, 855, 905, 955, 
-        1005, 1055, 1105, 1155, 1205, 1255, 1305, 1355, 1405,
-        ]
+    if timings is not None:
+        timings.print_table()
+        if save:
+            timings.save(f"sweep_{horizons[0]}-{horizons[-1]}rounds")
 
-    for rounds in round_counts:
-        run_tournament(rounds=rounds, save=True)
 
 
+if __name__ == "__main__":
+    from match_cache import MatchCache
+    from results_store import ResultsStore
 
+    run_sweep(SWEEP_ROUNDS, save=True, workers=os.cpu_count(), cache=MatchCache(), store=ResultsStore())
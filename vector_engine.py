@@ -0,0 +1,142 @@
+"""
+Lockstep NumPy engine for strategies that are small finite-state machines.
+
+A strategy opts in by declaring a `state_table` class attribute: a list of
+(move, next state if the opponent cooperates, next state if the opponent
+defects) rows, starting in state 0. For example TitForTat is
+
+    state_table = [('C', 0, 1), ('D', 0, 1)]
+
+All the tables in a tournament are stacked into one big table, so every
+table-vs-table pairing is a pair of indices into it and a whole round for
+every match is a handful of array lookups. Pairings involving strategies
+without a table are played the normal way through tournament.play_pairings.
+"""
+import numpy as np
+
+from tournament import load_strategies, pairings, play_pairings as play_object_pairings
+from tournament import print_rankings, record_match, results_folder, save_results
+from seeding import match_seeds
+from strategies.game import DEFAULT_GAME
+
+MOVES = ('C', 'D')
+
+
+def has_table(S):
+    return getattr(S, "state_table", None) is not None
+
+
+def compile_tables(classes):
+    """
+    Stack the state tables of `classes` into one.
+
+    Returns:
+        moves: int array, move (0 = C, 1 = D) played in each global state
+        next_state: int array of shape (states, 2), indexed by opponent move
+        start: dict[class -> global index of its state 0]
+    """
+    moves, next_state, start = [], [], {}
+    for S in classes:
+        if S in start:
+            continue
+        offset = len(moves)
+        start[S] = offset
+        for move, if_coop, if_defect in S.state_table:
+            if move not in MOVES:
+                raise ValueError(f"Invalid move in {S.__name__}.state_table: {move}")
+            moves.append(MOVES.index(move))
+            next_state.append((offset + if_coop, offset + if_defect))
+
+    return np.array(moves, dtype=np.intp), np.array(next_state, dtype=np.intp), start
+
+
+def play_table_pairings(matchups, rounds, game=DEFAULT_GAME):
+    """
+    Play every (S1, S2) pairing in lockstep; all classes need a state_table.
+
+    Identical class pairings are only simulated once, so big populations
+    with many copies of the same strategies stay cheap.
+
+    Returns a list of (score1, score2), in the same order as `matchups`.
+    """
+    if not matchups:
+        return []
+
+    unique = list(dict.fromkeys(matchups))
+    moves, next_state, start = compile_tables([S for pair in unique for S in pair])
+    next_flat = next_state.ravel()
+
+    # payoff for each joint move, indexed by 2 * move1 + move2
+    payoff1 = game.payoffs[..., 0].ravel()
+    payoff2 = game.payoffs[..., 1].ravel()
+
+    s1 = np.array([start[S1] for S1, _ in unique], dtype=np.intp)
+    s2 = np.array([start[S2] for _, S2 in unique], dtype=np.intp)
+    total1 = np.zeros(len(unique), dtype=game.payoffs.dtype)
+    total2 = np.zeros(len(unique), dtype=game.payoffs.dtype)
+
+    for _ in range(rounds):
+        m1 = moves[s1]
+        m2 = moves[s2]
+        joint = 2 * m1 + m2
+        total1 += payoff1[joint]
+        total2 += payoff2[joint]
+        s1 = next_flat[2 * s1 + m2]
+        s2 = next_flat[2 * s2 + m1]
+
+    scores = {pair: (a, b) for pair, a, b in zip(unique, total1.tolist(), total2.tolist())}
+    return [scores[pair] for pair in matchups]
+
+
+def play_pairings(matchups, rounds, workers=None, seed=None, game=DEFAULT_GAME):
+    """
+    Drop-in for tournament.play_pairings: table pairings go through the
+    lockstep engine, everything else falls back to the per-object path.
+    """
+    seeds = match_seeds(matchups, seed)
+    table_idx = [k for k, (S1, S2) in enumerate(matchups) if has_table(S1) and has_table(S2)]
+    table_set = set(table_idx)
+    object_idx = [k for k in range(len(matchups)) if k not in table_set]
+
+    scores = [None] * len(matchups)
+    table_scores = play_table_pairings([matchups[k] for k in table_idx], rounds, game)
+    object_scores = play_object_pairings([matchups[k] for k in object_idx], rounds, workers=workers,
+                                         seeds=[seeds[k] for k in object_idx], game=game)
+    for k, score in zip(table_idx, table_scores):
+        scores[k] = score
+    for k, score in zip(object_idx, object_scores):
+        scores[k] = score
+    return scores
+
+
+def run_tournament(rounds=100, save=True, workers=None, strategies=None, seed=None, game=DEFAULT_GAME):
+    """
+    Same as tournament.run_tournament, but using the lockstep engine where
+    it can. `strategies` may be any list of strategy classes (repeats are
+    fine) instead of everything in the strategies package.
+    """
+    if strategies is None:
+        strategies = load_strategies()
+    results = {s.__name__: 0 for s in strategies}
+    match_data = []
+
+    print(f"loaded {len(strategies)} strategies:")
+    for s in strategies:
+        print("  -", s.__name__ + (" (table)" if has_table(s) else ""))
+
+    matchups = pairings(strategies)
+    scores = play_pairings(matchups, rounds, workers=workers, seed=seed, game=game)
+
+    for (S1, S2), (score1, score2) in zip(matchups, scores):
+        record_match(results, match_data, S1, S2, score1, score2)
+
+    if save:
+        save_results(rounds, match_data, results, results_folder(game))
+
+    print_rankings(results)
+
+
+if __name__ == "__main__":
+    # long matches between the finite-state strategies only
+    table_strategies = [s for s in load_strategies() if has_table(s)]
+    run_tournament(rounds=100000, save=False, strategies=table_strategies)